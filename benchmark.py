@@ -0,0 +1,313 @@
+# Amelia Sinclaire 2024
+import argparse
+import contextlib
+import csv
+import curses
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from engine import COUNT_MASK, MINE_BIT, Difficulty, Engine, np
+import load_config
+import load_highscore
+
+# times the paths that get slow on big boards and long highscore files.
+#
+#   python benchmark.py --save before.json
+#   ... change something ...
+#   python benchmark.py --compare before.json
+#
+# every benchmark is seeded so runs are repeatable. each one is run a few
+# times and the fastest is kept, since anything slower than that was the
+# machine being busy. --compare exits with 1 if anything got slower than
+# the threshold allows.
+
+# (width, height, ratio) for the populate benchmarks
+populate_sizes = [(9, 9, 0.123), (16, 16, 0.156), (30, 16, 0.206),
+                  (100, 100, 0.15), (300, 300, 0.05), (300, 300, 0.5)]
+# row counts for the highscore benchmarks
+highscore_rows = [10_000, 100_000, 1_000_000]
+
+
+def populate(width: int, height: int, ratio: float) -> float:
+    n_mines = round(width * height * ratio)
+    engine = Engine(width, height, n_mines, rng=random.Random(0))
+    start = time.perf_counter()
+    engine.populate(height // 2, width // 2)
+    return time.perf_counter() - start
+
+
+def flood() -> float:
+    # one click that opens most of a 1000x1000 board
+    engine = Engine(1000, 1000, 1000, rng=random.Random(0))
+    engine.populate(500, 500)
+    engine.is_first_click = False
+    start = time.perf_counter()
+    engine.open_cell(500, 500)
+    return time.perf_counter() - start
+
+
+def chord() -> float:
+    # every mine is flagged and every number is open, then each number is
+    # chorded, which opens everything else
+    engine = Engine(100, 100, 1500, rng=random.Random(0))
+    engine.populate(50, 50)
+    engine.is_first_click = False
+    for row, col in engine.mines:
+        engine.flag(row, col)
+    numbers = [divmod(idx, engine.width)
+               for idx, cell in enumerate(engine.cells)
+               if cell & COUNT_MASK and not cell & MINE_BIT]
+    for row, col in numbers:
+        engine.open_cell(row, col)
+    start = time.perf_counter()
+    for row, col in numbers:
+        engine.reveal(row, col)
+    return time.perf_counter() - start
+
+
+def check_win() -> float:
+    # per call, on a game still being played
+    engine = Engine(30, 16, 99, rng=random.Random(0))
+    engine.populate(8, 15)
+    n = 1_000_000
+    start = time.perf_counter()
+    for _ in range(n):
+        engine.check_win()
+    return (time.perf_counter() - start) / n
+
+
+class FakeWindow:
+    # takes everything a curses window or pad is asked to draw and
+    # throws it away
+    def __init__(self, height: int = 1000, width: int = 1000) -> None:
+        self.height = height
+        self.width = width
+
+    def getmaxyx(self) -> (int, int):
+        return self.height, self.width
+
+    def addstr(self, *args) -> None:
+        pass
+
+    def move(self, *args) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def noutrefresh(self, *args) -> None:
+        pass
+
+
+@contextlib.contextmanager
+def fake_curses() -> None:
+    # the parts of curses that need a real terminal
+    fakes = {'has_colors': lambda: True,
+             'color_pair': lambda n: n << 8,
+             'newpad': lambda *args: FakeWindow(),
+             'doupdate': lambda: None,
+             'flash': lambda: None}
+    real = {name: getattr(curses, name) for name in fakes}
+    for name, fake in fakes.items():
+        setattr(curses, name, fake)
+    try:
+        yield
+    finally:
+        for name, f in real.items():
+            setattr(curses, name, f)
+
+
+def display(width: int, height: int, ratio: float) -> float:
+    # a full redraw partway through a game
+    from meeleymine import Board
+    config = load_config.default_config()
+    config = load_config.initialize_structure(config)
+    config = load_config.fill_uninitialized_values(config)
+    config = load_config.replace_none_default_colors(
+        load_config.replace_hex(config))
+    # seeded boards don't make layouts in the background
+    config['SEED'] = 0
+    with fake_curses():
+        board = Board(width, height, ratio, Difficulty.CUSTOM, config,
+                      FakeWindow())
+        board.engine.rng = random.Random(0)
+        board.reveal()
+        start = time.perf_counter()
+        board.display()
+        elapsed = time.perf_counter() - start
+        board.close()
+    return elapsed
+
+
+def read_config() -> float:
+    # config.yaml is made the first time, so this times reading it back
+    load_config.load_config()
+    start = time.perf_counter()
+    load_config.load_config()
+    return time.perf_counter() - start
+
+
+def write_highscores(rows: int) -> None:
+    # a highscores.csv the way add_and_save_scores writes one, sorted and
+    # grouped by difficulty
+    rng = random.Random(0)
+    names = ['AMELIA', 'PLACID', 'CENTUM', 'AFRAID', 'DEPUTY', 'DOCTOR']
+    with open(load_highscore.highscore_filepath, 'w') as csvfile:
+        writer = csv.writer(csvfile, delimiter=' ')
+        for difficulty in Difficulty:
+            scores = sorted(rng.randrange(1, 3_600_000_000)
+                            for _ in range(rows // len(Difficulty)))
+            for score in scores:
+                t = datetime.timedelta(microseconds=score)
+                writer.writerow([difficulty.name, rng.choice(names),
+                                 f'{datetime.datetime.min + t:%H:%M:%S.%f}'])
+            writer.writerow('')
+
+
+def load_highscores() -> float:
+    # reading the file, not whatever load_highscore has kept from last time
+    load_highscore._cache = None
+    start = time.perf_counter()
+    load_highscore.load_real_highscores()
+    return time.perf_counter() - start
+
+
+def load_cached_highscores() -> float:
+    # what opening the highscore screen costs once the file has been read
+    load_highscore.load_real_highscores()
+    start = time.perf_counter()
+    load_highscore.load_raw_highscores_for_difficulty(Difficulty.EXPERT)
+    return time.perf_counter() - start
+
+
+def save_highscores() -> float:
+    # adding one score to a history that is never trimmed
+    data = load_highscore.load_real_highscores()
+    score = datetime.timedelta(minutes=1)
+    start = time.perf_counter()
+    load_highscore.add_and_save_scores(data, Difficulty.EXPERT, 'BENCH',
+                                       score, math.inf)
+    return time.perf_counter() - start
+
+
+def best(sample, repeat: int) -> float:
+    return min(sample() for _ in range(repeat))
+
+
+def run(repeat: int, rows: [int], only: str) -> {str: float}:
+    benchmarks = []
+    for width, height, ratio in populate_sizes:
+        benchmarks.append(
+            (f'populate {width}x{height} {ratio}',
+             lambda w=width, h=height, r=ratio: populate(w, h, r)))
+    benchmarks += [('flood 1000x1000', flood),
+                   ('chord 100x100', chord),
+                   ('check_win', check_win),
+                   ('display 30x16', lambda: display(30, 16, 0.206)),
+                   ('display 300x200', lambda: display(300, 200, 0.1)),
+                   ('load_config', read_config)]
+    highscores = []
+    for n in rows:
+        highscores += [(f'load_real_highscores {n}', n, load_highscores),
+                       (f'cached highscores {n}', n, load_cached_highscores),
+                       (f'add_and_save_scores {n}', n, save_highscores)]
+
+    results = {}
+    home = os.getcwd()
+    # config and highscore files are made in here, not next to the game's
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            for name, sample in benchmarks:
+                if only in name:
+                    results[name] = best(sample, repeat)
+                    print(f'{name:<32} {results[name] * 1e6:14.1f} us',
+                          file=sys.stderr)
+            written = None
+            for name, n, sample in highscores:
+                if only not in name:
+                    continue
+                if written != n:
+                    write_highscores(n)
+                    written = n
+                # these are slow enough that fewer runs is plenty
+                results[name] = best(sample, min(repeat, 3))
+                print(f'{name:<32} {results[name] * 1e6:14.1f} us',
+                      file=sys.stderr)
+        finally:
+            os.chdir(home)
+    return results
+
+
+def compare(results: {str: float}, baseline: {str: float},
+            threshold: float) -> bool:
+    # prints how each benchmark changed, False if any got slower than
+    # threshold allows
+    ok = True
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        change = seconds / before - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            ok = False
+        print(f'{name:<32} {before * 1e6:14.1f} -> {seconds * 1e6:14.1f} '
+              f'us {change:+8.1%}{flag}')
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Time the slow paths of the game.')
+    parser.add_argument('--save', help='write the results to this file')
+    parser.add_argument('--compare',
+                        help='compare with results saved by --save')
+    parser.add_argument('--threshold', default=0.25, type=float,
+                        help='how much slower counts as a regression, '
+                             'as a fraction')
+    parser.add_argument('--repeat', default=5, type=int,
+                        help='runs of each benchmark, the fastest is kept')
+    parser.add_argument('--rows', default=highscore_rows, type=int,
+                        nargs='+', help='highscore file sizes to time')
+    parser.add_argument('-k', '--only', default='',
+                        help='only run benchmarks with this in their name')
+    args = parser.parse_args()
+
+    if args.repeat < 1:
+        raise ValueError(f'Invalid repeat: {args.repeat}. Must be at least 1')
+    if args.threshold < 0:
+        raise ValueError(
+            f'Invalid threshold: {args.threshold}. Must not be negative')
+
+    # read the baseline before spending minutes on the benchmarks
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)['results']
+
+    results = run(args.repeat, args.rows, args.only)
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(),
+                       'machine': platform.platform(),
+                       # populate is a lot faster with numpy, results
+                       # with and without it shouldn't be compared
+                       'numpy': np is not None,
+                       'results': results}, f, indent=4)
+    if baseline is not None and not compare(results, baseline,
+                                            args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
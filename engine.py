@@ -0,0 +1,402 @@
+# Amelia Sinclaire 2024
+from enum import Enum
+import itertools
+import random
+from typing import Any
+
+from timer import Timer
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy is optional, it only speeds up populating big boards
+    np = None
+
+# the rules of the game live here, away from any terminal code, so that
+# games can be played (and benchmarked) without curses or a pty.
+# do NOT import curses in this module.
+
+
+class Difficulty(Enum):
+    BEGINNER = 0
+    INTERMEDIATE = 1
+    EXPERT = 2
+    CUSTOM = 3
+
+    def __lt__(self, other):
+        if self.__class__ is other.__class__:
+            return self.value < other.value
+        return NotImplemented
+
+
+class GameState(Enum):
+    PLAYING = 0
+    WON = 1
+    LOST = 2
+    PAUSED = 3
+
+
+class Cell(Enum):
+    BLANK = 0
+    ONE = 1  # BLUE
+    TWO = 2  # GREEN
+    THREE = 3  # RED
+    FOUR = 4  # NAVY
+    FIVE = 5  # MAROON
+    SIX = 6  # CYAN
+    SEVEN = 7  # BLACK
+    EIGHT = 8  # GRAY
+    MINE = 9
+    FLAG = 10
+    UNOPENED = 11
+    OPENED = 12
+
+    def print(self, symbols):
+        return symbols[self.name]
+
+    def __le__(self, other):
+        if self.__class__ is other.__class__:
+            return self.value <= other.value
+        return NotImplemented
+
+
+# each cell of the board is packed into a single byte. the low 4 bits hold
+# the number of adjacent mines and the high bits hold its state.
+COUNT_MASK = 0x0f
+MINE_BIT = 0x10
+OPEN_BIT = 0x20
+FLAG_BIT = 0x40
+
+# lookup tables to turn a packed byte back into a Cell.
+# counts above 8 can't happen, so they map to None
+REAL_CELLS = tuple(Cell.MINE if b & MINE_BIT else
+                   Cell(b & COUNT_MASK) if b & COUNT_MASK <= 8 else None
+                   for b in range(128))
+MY_CELLS = tuple(Cell.OPENED if b & OPEN_BIT else
+                 Cell.FLAG if b & FLAG_BIT else Cell.UNOPENED
+                 for b in range(128))
+VISIBLE_CELLS = tuple(REAL_CELLS[b] if b & OPEN_BIT else MY_CELLS[b]
+                      for b in range(128))
+# opens every cell and removes every flag, used when the game is lost
+REVEAL_ALL = bytes((b | OPEN_BIT) & ~FLAG_BIT & 0xff for b in range(256))
+
+
+class Engine:
+    neighbors = [x for x in itertools.product(range(-1, 2),
+                                              range(-1, 2)) if x != (0, 0)]
+
+    def __init__(self, width: int, height: int, n_mines: int,
+                 open_start: bool = False, chording: bool = True,
+                 lock_flags: bool = True, no_guess: bool = False,
+                 rng: Any = random, layouts: Any = None) -> None:
+        self.width = width
+        self.height = height
+        self.n_mines = n_mines
+
+        self.open_start = open_start
+        self.chording = chording
+        self.lock_flags = lock_flags
+        # only hand out boards that can be solved without guessing
+        self.no_guess = no_guess
+        # anything with random.Random's interface. defaults to the module
+        # so that random.seed() keeps working for seeded games
+        self.rng = rng
+        # somewhere to get ready made layouts from, see layout_queue
+        self.layouts = layouts
+
+        self.reset()
+
+    def reset(self) -> None:
+        self.mines = []
+        self.moves = []
+
+        # only runs while playing, from the first click to a win or loss
+        self.timer = Timer()
+        # microseconds taken to win
+        self.score = 0
+
+        # both the real board and the player's view, indexed by
+        # row * width + col. see the *_BIT constants above
+        self.cells = bytearray(self.width * self.height)
+        self.death = (-1, -1)
+        self.is_first_click = True
+        # whether the board was proven to be winnable without guessing
+        self.guess_free = False
+        # unopened cells that are not mines. flags don't change this, a
+        # flagged cell is still unopened
+        self.safe_remaining = self.width * self.height - self.n_mines
+        self.n_flags = 0
+
+        self.state = GameState.PLAYING
+        self.previous_state = self.state
+
+    def pause(self) -> None:
+        if self.state == GameState.PAUSED:
+            # unpause
+            self.state = self.previous_state
+            if (not self.is_first_click
+                    and self.state == GameState.PLAYING):
+                self.timer.start()
+        else:
+            # pause
+            self.timer.stop()
+            self.previous_state = self.state
+            self.state = GameState.PAUSED
+
+    def elapsed(self) -> int:
+        # microseconds shown on the clock right now
+        return self.timer.elapsed()
+
+    @property
+    def remaining_mines(self) -> int:
+        # what the mine counter shows, can go negative if over flagged
+        return self.n_mines - self.n_flags
+
+    def real_cell(self, row: int, col: int) -> Cell:
+        # what is actually in the cell, a number or a mine
+        return REAL_CELLS[self.cells[row * self.width + col]]
+
+    def my_cell(self, row: int, col: int) -> Cell:
+        # what the player knows about the cell, opened, flagged or unopened
+        return MY_CELLS[self.cells[row * self.width + col]]
+
+    def visible_cell(self, row: int, col: int) -> Cell:
+        # what should be drawn, the real cell if opened otherwise my cell
+        return VISIBLE_CELLS[self.cells[row * self.width + col]]
+
+    @property
+    def real_board(self) -> [[Cell]]:
+        w = self.width
+        return [[REAL_CELLS[b] for b in self.cells[r * w:(r + 1) * w]]
+                for r in range(self.height)]
+
+    @property
+    def my_board(self) -> [[Cell]]:
+        w = self.width
+        return [[MY_CELLS[b] for b in self.cells[r * w:(r + 1) * w]]
+                for r in range(self.height)]
+
+    def in_bounds(self, coord: (int, int)) -> bool:
+        row, col = coord
+        return 0 <= row < self.height and 0 <= col < self.width
+
+    def safe_zone(self, row: int, col: int) -> {(int, int)}:
+        # cells that can never hold a mine for a first click at row, col.
+        # with OPEN_START that is the whole 3x3 opening
+        if not self.open_start:
+            return {(row, col)}
+        return {(r, c) for r in range(row - 1, row + 2)
+                for c in range(col - 1, col + 2) if self.in_bounds((r, c))}
+
+    def count_all_mines(self) -> None:
+        # every mine adds one to each of its neighbors
+        cells = self.cells
+        for m_row, m_col in self.mines:
+            for n_r, n_c in Engine.neighbors:
+                r, c = m_row + n_r, m_col + n_c
+                if 0 <= r < self.height and 0 <= c < self.width:
+                    cells[r * self.width + c] += 1
+
+    def count_all_mines_numpy(self) -> None:
+        # same as count_all_mines, but sums the 8 shifted copies of a
+        # padded mine grid in one go. writes straight into self.cells
+        grid = np.frombuffer(self.cells, dtype=np.uint8).reshape(
+            self.height, self.width)
+        padded = np.pad((grid & MINE_BIT) != 0, 1).astype(np.uint8)
+        counts = np.zeros((self.height, self.width), dtype=np.uint8)
+        for n_r, n_c in Engine.neighbors:
+            counts += padded[1 + n_r:1 + n_r + self.height,
+                             1 + n_c:1 + n_c + self.width]
+        grid += counts
+
+    def sample_mines(self, row: int, col: int) -> [int]:
+        # flat indices of a random set of mines for a first click at row, col
+        # mines are only ever sampled from outside the safe zone, so they
+        # never need to be moved out of the way afterwards
+        # flat indices are sampled straight from a range, so no list of
+        # every cell on the board is ever built
+        size = self.width * self.height
+        safe = sorted(r * self.width + c
+                      for r, c in self.safe_zone(row, col))
+        if self.n_mines <= size - len(safe):
+            indices = self.rng.sample(range(size - len(safe)),
+                                      k=self.n_mines)
+            # shift each index past the safe cells at or before it, which
+            # maps range(size - len(safe)) onto the cells outside the zone
+            for i, idx in enumerate(indices):
+                for s in safe:
+                    if idx >= s:
+                        idx += 1
+                indices[i] = idx
+        elif self.open_start:
+            raise Exception('No where to move mines to!')
+        else:
+            indices = list(range(size))
+        return indices
+
+    def populate(self, row: int, col: int) -> None:
+        # set mines
+        indices = None
+        if self.layouts is not None:
+            # one made ahead of time, if there is one for this click
+            layout = self.layouts.get(self, row, col)
+            if layout is not None:
+                indices, self.guess_free = layout
+        if indices is None:
+            if self.no_guess:
+                # imported here because no_guess plays games on an Engine
+                import no_guess
+                indices = no_guess.find_layout(self, row, col)
+                self.guess_free = indices is not None
+            if indices is None:
+                # no guess is off, or it gave up looking and this board
+                # might need a guess
+                indices = self.sample_mines(row, col)
+        self.mines = [divmod(idx, self.width) for idx in indices]
+        for idx in indices:
+            self.cells[idx] |= MINE_BIT
+
+        # populate numbers
+        if np is not None:
+            self.count_all_mines_numpy()
+        else:
+            self.count_all_mines()
+
+        self.timer.start()
+
+    def won(self) -> None:
+        self.state = GameState.WON
+        self.timer.stop()
+
+        self.score = self.timer.elapsed()
+        for m_row, m_col in self.mines:
+            self.cells[m_row * self.width + m_col] |= FLAG_BIT
+        # every safe cell is open, so the only flags left are on mines
+        self.n_flags = len(self.mines)
+
+    def check_win(self) -> None:
+        if self.state != GameState.PLAYING:
+            return
+        if self.safe_remaining == 0:
+            self.won()
+
+    def reveal_all(self) -> None:
+        self.cells = self.cells.translate(REVEAL_ALL)
+        self.n_flags = 0
+
+    def lose(self, row: int, col: int) -> None:
+        self.state = GameState.LOST
+        self.timer.stop()
+
+        self.reveal_all()
+        self.death = (row, col)
+
+    def surrounding_flags(self, row: int, col: int) -> int:
+        count = 0
+        for n_r, n_c in Engine.neighbors:
+            r, c = row + n_r, col + n_c
+            if (self.in_bounds((r, c))
+                    and self.cells[r * self.width + c] & FLAG_BIT):
+                count += 1
+        return count
+
+    def open_cell(self, row: int, col: int) -> [(int, int)]:
+        # opens a single cell, flood filling out from it if it is blank.
+        # uses a worklist instead of recursion so big openings can't hit
+        # the recursion limit. returns every cell that was opened.
+        opened = []
+        if self.state != GameState.PLAYING:
+            return opened
+
+        width, height = self.width, self.height
+        cells = self.cells
+        cell = cells[row * width + col]
+        if cell & OPEN_BIT:
+            return opened
+
+        if self.lock_flags and cell & FLAG_BIT:
+            return opened
+
+        if cell & MINE_BIT:
+            self.lose(row, col)
+            return opened
+
+        if cell & FLAG_BIT:
+            self.n_flags -= 1
+        cells[row * width + col] = (cell | OPEN_BIT) & ~FLAG_BIT
+        opened.append((row, col))
+        self.safe_remaining -= 1
+        stack = []
+        if not cell & COUNT_MASK:
+            stack.append((row, col))
+        while stack:
+            r, c = stack.pop()
+            # neighbors of a blank cell can never be mines
+            for n_r, n_c in Engine.neighbors:
+                nr, nc = r + n_r, c + n_c
+                if not (0 <= nr < height and 0 <= nc < width):
+                    continue
+                idx = nr * width + nc
+                seen = cells[idx]
+                if seen & OPEN_BIT:
+                    continue
+                if seen & FLAG_BIT:
+                    if self.lock_flags:
+                        continue
+                    self.n_flags -= 1
+                cells[idx] = (seen | OPEN_BIT) & ~FLAG_BIT
+                opened.append((nr, nc))
+                self.safe_remaining -= 1
+                if not seen & COUNT_MASK:
+                    stack.append((nr, nc))
+        self.check_win()
+        return opened
+
+    def reveal(self, row: int, col: int) -> [(int, int)]:
+        if not self.state == GameState.PLAYING:
+            return []
+        if not self.in_bounds((row, col)):
+            return []
+
+        if self.is_first_click:
+            self.populate(row, col)
+            self.is_first_click = False
+
+        self.moves.append((row, col))
+
+        # chording
+        cell = self.cells[row * self.width + col]
+        if (self.chording
+                and cell & OPEN_BIT
+                and not cell & MINE_BIT
+                and cell & COUNT_MASK):
+            opened = []
+            if self.surrounding_flags(row, col) == cell & COUNT_MASK:
+                # chord
+                # reveal 8 surrounding cells
+                # * that are not flags
+                for n_r, n_c in Engine.neighbors:
+                    r, c = row + n_r, col + n_c
+                    if (self.in_bounds((r, c))
+                            and not self.cells[r * self.width + c]
+                            & FLAG_BIT):
+                        opened += self.open_cell(r, c)
+            return opened
+
+        return self.open_cell(row, col)
+
+    def flag(self, row: int, col: int) -> None:
+        if self.state != GameState.PLAYING:
+            return
+        if not self.in_bounds((row, col)):
+            return
+
+        idx = row * self.width + col
+        if self.cells[idx] & OPEN_BIT:
+            return
+        if self.cells[idx] & FLAG_BIT:
+            self.cells[idx] &= ~FLAG_BIT
+            self.n_flags -= 1
+        else:
+            self.cells[idx] |= FLAG_BIT
+            self.n_flags += 1
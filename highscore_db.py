@@ -0,0 +1,140 @@
+# Amelia Sinclaire 2024
+import datetime
+import math
+import os.path
+import sqlite3
+import threading
+from typing import Any
+
+from engine import Difficulty
+
+# highscores kept in an sqlite database instead of highscores.csv. used
+# when HIGHSCORES:STORAGE is set to sqlite in the config.
+#
+# the csv is read and rewritten whole every time, which gets slow once
+# the lists are allowed to grow forever. here every score is a row,
+# indexed on (difficulty, score), so the best few scores and whether a
+# new one makes the list are answered from the index, and saving a score
+# only writes that one row.
+#
+# scores are kept as whole microseconds, the same as Engine.score.
+# the first time the database is made any scores in highscores.csv are
+# copied into it.
+
+highscore_db_path = 'highscores.db'
+
+_connection = None
+# the game only uses this from one thread, but it is cheap to be safe
+_connection_lock = threading.Lock()
+
+
+def connection() -> sqlite3.Connection:
+    # one connection for the whole run, made the first time it is needed
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            _connection = connect(highscore_db_path)
+    return _connection
+
+
+def connect(path: str) -> sqlite3.Connection:
+    # opens the database at path, making it if it doesn't exist yet
+    is_new = not os.path.isfile(path)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    with conn:
+        conn.execute('CREATE TABLE IF NOT EXISTS scores ('
+                     'id INTEGER PRIMARY KEY,'
+                     'difficulty TEXT NOT NULL,'
+                     'name TEXT NOT NULL,'
+                     'score INTEGER NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS scores_by_difficulty '
+                     'ON scores (difficulty, score)')
+    if is_new:
+        import load_highscore
+        if os.path.isfile(load_highscore.highscore_filepath):
+            import_csv(conn, load_highscore.highscore_filepath)
+    return conn
+
+
+def to_us(score: datetime.timedelta) -> int:
+    return score // datetime.timedelta(microseconds=1)
+
+
+def import_csv(conn: sqlite3.Connection, path: str) -> int:
+    # copies every score in a highscores.csv into the database, in one
+    # transaction. returns how many were copied
+    import load_highscore
+    # read the same way the csv store reads it, so a file that loads
+    # there loads here
+    scores = load_highscore.convert_raw_to_real(
+        load_highscore.load_raw_highscores(path))
+    rows = [(difficulty.name, name, to_us(score))
+            for difficulty, name, score in scores]
+    with conn:
+        conn.executemany('INSERT INTO scores (difficulty, name, score) '
+                         'VALUES (?, ?, ?)', rows)
+    return len(rows)
+
+
+def limit(max_scores: Any) -> int:
+    # sqlite takes a negative LIMIT as no limit at all
+    if max_scores is None or max_scores == math.inf:
+        return -1
+    return int(max_scores)
+
+
+def load_highscores_for_difficulty(difficulty: Difficulty,
+                                   max_scores: Any = math.inf,
+                                   conn: sqlite3.Connection = None) \
+        -> [[Difficulty, str, datetime.timedelta]]:
+    # the best max_scores scores for difficulty, best first. ties go to
+    # whoever got there first
+    if conn is None:
+        conn = connection()
+    rows = conn.execute('SELECT name, score FROM scores '
+                        'WHERE difficulty = ? ORDER BY score, id LIMIT ?',
+                        (difficulty.name, limit(max_scores)))
+    return [[difficulty, name, datetime.timedelta(microseconds=score)]
+            for name, score in rows]
+
+
+def qualifies(difficulty: Difficulty, score: datetime.timedelta,
+              max_scores: Any,
+              conn: sqlite3.Connection = None) -> bool:
+    # True if score would make the list of the best max_scores
+    if limit(max_scores) < 0:
+        return True
+    if max_scores == 0:
+        return False
+    if conn is None:
+        conn = connection()
+    # the worst score still on the list, if the list is full
+    row = conn.execute('SELECT score FROM scores WHERE difficulty = ? '
+                       'ORDER BY score, id LIMIT 1 OFFSET ?',
+                       (difficulty.name, limit(max_scores) - 1)).fetchone()
+    return row is None or to_us(score) < row[0]
+
+
+def add_score(difficulty: Difficulty, name: str, score: datetime.timedelta,
+              max_scores: Any, conn: sqlite3.Connection = None) -> None:
+    # saves one score. scores that fall off the bottom of the list are
+    # dropped in the same transaction
+    if conn is None:
+        conn = connection()
+    with conn:
+        conn.execute('INSERT INTO scores (difficulty, name, score) '
+                     'VALUES (?, ?, ?)', (difficulty.name, name, to_us(score)))
+        if limit(max_scores) >= 0:
+            conn.execute('DELETE FROM scores WHERE id IN ('
+                         'SELECT id FROM scores WHERE difficulty = ? '
+                         'ORDER BY score, id LIMIT -1 OFFSET ?)',
+                         (difficulty.name, limit(max_scores)))
+
+
+if __name__ == '__main__':
+    # copies highscores.csv into a new highscores.db ahead of time
+    if os.path.isfile(highscore_db_path):
+        raise Exception(f'{highscore_db_path} already exists')
+    n = connect(highscore_db_path).execute(
+        'SELECT COUNT(*) FROM scores').fetchone()[0]
+    print(f'Copied {n} scores into {highscore_db_path}')
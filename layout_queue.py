@@ -0,0 +1,116 @@
+# Amelia Sinclaire 2024
+import collections
+import random
+import threading
+
+from engine import Engine
+
+# mine layouts for the next few games, made on a background thread while
+# the current game is being played so the first click doesn't have to
+# wait for one.
+#
+# a plain layout is kept as more cells than there are mines, in random
+# order. once the first click is known the first n_mines of them outside
+# its safe zone are used, which is the same as sampling around the safe
+# zone to begin with.
+# a no guess layout only works for the click it was solved from, so those
+# are made for the middle of the board, where the cursor starts. if the
+# search gives up a plain layout is kept instead, marked as not guess free.
+
+
+class LayoutQueue:
+    def __init__(self, width: int, height: int, n_mines: int,
+                 open_start: bool = False, no_guess: bool = False,
+                 size: int = 2) -> None:
+        self.width = width
+        self.height = height
+        self.n_mines = n_mines
+        self.open_start = open_start
+        self.no_guess = no_guess
+        # how many layouts to keep ready
+        self.size = size
+
+        # (first click or None, flat indices, guess free)
+        self.ready = collections.deque()
+        self.lock = threading.Condition()
+        self.closed = False
+        # set by close() to cut a no guess search short
+        self.stop = threading.Event()
+        # what stopped the thread, raised again by get()
+        self.error = None
+        self.thread = threading.Thread(target=self.fill, daemon=True)
+        self.thread.start()
+
+    def make(self, rng: random.Random) -> ((int, int), [int], bool):
+        size = self.width * self.height
+        # enough spares that a whole 3x3 safe zone can be skipped
+        k = min(size, self.n_mines + 9)
+        if not self.no_guess:
+            return None, rng.sample(range(size), k=k), False
+
+        # imported here for the same reason as in Engine.populate
+        import no_guess
+        click = (self.height // 2, self.width // 2)
+        scratch = Engine(self.width, self.height, self.n_mines,
+                         open_start=self.open_start, rng=rng)
+        indices = no_guess.find_layout(scratch, *click, stop=self.stop)
+        if indices is None:
+            return None, rng.sample(range(size), k=k), False
+        return click, indices, True
+
+    def fill(self) -> None:
+        # runs on the background thread until close() is called
+        rng = random.Random()
+        while True:
+            with self.lock:
+                while len(self.ready) >= self.size and not self.closed:
+                    self.lock.wait()
+                if self.closed:
+                    return
+            try:
+                layout = self.make(rng)
+            except Exception as e:
+                # say a board too dense for OPEN_START. kept for get() to
+                # raise, a traceback here would land on top of the game
+                with self.lock:
+                    self.error = e
+                return
+            with self.lock:
+                if self.closed:
+                    return
+                self.ready.append(layout)
+
+    def get(self, engine: Engine, row: int, col: int) -> ([int], bool):
+        # mines for a first click at row, col on engine, taken from a
+        # ready layout, and whether they are guess free. None if there
+        # isn't a ready one that fits
+        with self.lock:
+            for i, (click, indices, guess_free) in enumerate(self.ready):
+                if click is None or click == (row, col):
+                    del self.ready[i]
+                    # wake the thread up to replace it
+                    self.lock.notify()
+                    break
+            else:
+                if self.error is not None:
+                    raise self.error
+                return None
+        if click is not None:
+            return indices, guess_free
+
+        safe = {r * self.width + c for r, c in engine.safe_zone(row, col)}
+        mines = [idx for idx in indices if idx not in safe][:self.n_mines]
+        if len(mines) < self.n_mines:
+            # too dense to keep the safe zone clear
+            return None
+        return mines, guess_free
+
+    def close(self) -> None:
+        # stops the thread and waits for it, so a no guess search has
+        # cancelled whatever it had queued on the pool by the time this
+        # returns
+        with self.lock:
+            self.closed = True
+            self.stop.set()
+            self.lock.notify()
+        self.thread.join()
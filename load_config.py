@@ -54,12 +54,15 @@ def default_config() -> dict:
                          'END': ['KEY_END'],
                          'CEILING': ['KEY_PPAGE'],
                          'FLOOR': ['KEY_NPAGE'],
+                         'HINT': ['?'],
+                         'OVERLAY': ['o'],
                          'HELP': ['h'],
                          'HIGHSCORES': ['p'],
                          'MENU': ['m'],
                          'EXIT': ['q']
                          },
             'SETUP': {'OPEN_START': False,
+                      'NO_GUESS': False,
                       'CHORDING': True,
                       'LOCK_FLAGS': True,
                       'NO_FLASH': False,
@@ -77,7 +80,8 @@ def default_config() -> dict:
                       'EXPERT': {'WIDTH': 30,
                                  'HEIGHT': 16,
                                  'RATIO': 0.206}},
-            'HIGHSCORES': {'MAX_NAME_LENGTH': 6,
+            'HIGHSCORES': {'STORAGE': 'csv',
+                           'MAX_NAME_LENGTH': 6,
                            'BEGINNER_MAX': 10,
                            'INTERMEDIATE_MAX': 10,
                            'EXPERT_MAX': 10,
@@ -197,7 +201,7 @@ def fill_uninitialized_values(config: dict) -> dict:
     # adding hardcoded values for controls if none are specified
 
     always_set = ['LEFT', 'RIGHT', 'UP', 'DOWN', 'REVEAL', 'FLAG', 'RESET',
-                  'HELP', 'MENU', 'EXIT']
+                  'HINT', 'OVERLAY', 'HELP', 'MENU', 'EXIT']
     for k in always_set:
         if config['CONTROLS'].get(k) is None:
             config['CONTROLS'][k] = hard_coded['CONTROLS'][k]
@@ -206,6 +210,8 @@ def fill_uninitialized_values(config: dict) -> dict:
     hard_coded_setup = hard_coded['SETUP']
     if config['SETUP'].get('OPEN_START') is None:
         config['SETUP']['OPEN_START'] = hard_coded['SETUP']['OPEN_START']
+    if config['SETUP'].get('NO_GUESS') is None:
+        config['SETUP']['NO_GUESS'] = hard_coded['SETUP']['NO_GUESS']
     if config['SETUP'].get('CHORDING') is None:
         config['SETUP']['CHORDING'] = hard_coded['SETUP']['CHORDING']
     if config['SETUP'].get('LOCK_FLAGS') is None:
@@ -230,7 +236,8 @@ def fill_uninitialized_values(config: dict) -> dict:
 
     # adding hardcoded values for highscores if none are specified
     # hard_coded_highscore = hard_coded['HIGHSCORES']
-    hard_coded_highscore = {'MAX_NAME_LENGTH': math.inf,
+    hard_coded_highscore = {'STORAGE': 'csv',
+                            'MAX_NAME_LENGTH': math.inf,
                             'BEGINNER_MAX': math.inf,
                             'INTERMEDIATE_MAX': math.inf,
                             'CUSTOM_MAX': math.inf}
@@ -276,6 +283,9 @@ def type_check_values(config: dict):
     if (not isinstance(config['SETUP']['OPEN_START'], bool)
             and config['SETUP']['OPEN_START'] is not None):
         raise TypeError(f'Config for SETUP:OPEN_START must be of type bool.')
+    if (not isinstance(config['SETUP']['NO_GUESS'], bool)
+            and config['SETUP']['NO_GUESS'] is not None):
+        raise TypeError(f'Config for SETUP:NO_GUESS must be of type bool.')
     if (not isinstance(config['SETUP']['CHORDING'], bool)
             and config['SETUP']['CHORDING'] is not None):
         raise TypeError(f'Config for SETUP:CHORDING must be of type bool.')
@@ -335,8 +345,11 @@ def type_check_values(config: dict):
                     f'Config for SETUP:{d.name}:RATIO must be of type float.')
 
     # HIGHSCORES
+    if (not isinstance(config['HIGHSCORES']['STORAGE'], str)
+            and config['HIGHSCORES']['STORAGE'] is not None):
+        raise TypeError(f'Config for HIGHSCORES:STORAGE must be of type str.')
     for k_n, k_v in config['HIGHSCORES'].items():
-        if k_v is None:
+        if k_n == 'STORAGE' or k_v is None:
             continue
         try:
             int(k_v)
@@ -435,8 +448,11 @@ def value_check_values(config: dict):
             config['HIGHSCORES']['MAX_NAME_LENGTH']) < 1:
         raise ValueError(
             f'Config at HIGHSCORES:MAX_NAME_LENGTH cannot be less than 1.')
+    if config['HIGHSCORES']['STORAGE'] not in (None, 'csv', 'sqlite'):
+        raise ValueError(
+            f'Config at HIGHSCORES:STORAGE must be csv or sqlite.')
     for k_n, k_v in config['HIGHSCORES'].items():
-        if k_n == 'MAX_NAME_LENGTH' or k_v is None:
+        if k_n in ('MAX_NAME_LENGTH', 'STORAGE') or k_v is None:
             continue
         if k_v < 0:
             raise ValueError(
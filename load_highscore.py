@@ -2,6 +2,7 @@ import csv
 import datetime
 import math
 import operator
+import os
 from typing import Any
 
 # type Any used instead of Difficulty
@@ -9,12 +10,57 @@ from typing import Any
 
 highscore_filepath = 'highscores.csv'
 
-
-def load_raw_highscores() -> [[str, str, str]]:
+# the parsed file, kept until it changes on disk. see cached()
+_cache = None
+
+
+class HighscoreCache:
+    # everything the game needs from highscores.csv, parsed once
+    def __init__(self, key: (int, int),
+                 highscore_data: [[Any, str, datetime.timedelta]]) -> None:
+        # (mtime, size) of the file this was read from
+        self.key = key
+        self.highscore_data = highscore_data
+        # each difficulty's scores, best first
+        self.by_difficulty: {str: [[Any, str, datetime.timedelta]]} = {}
+        for hs in sorted(highscore_data, key=operator.itemgetter(2)):
+            self.by_difficulty.setdefault(hs[0].name, []).append(hs)
+        # and as the strings they are shown as, made the first time each
+        # difficulty is shown
+        self.raw_by_difficulty: {str: [[str, str, str]]} = {}
+
+    def raw(self, difficulty: Any) -> [[str, str, str]]:
+        raw = self.raw_by_difficulty.get(difficulty.name)
+        if raw is None:
+            raw = convert_real_to_raw(
+                self.by_difficulty.get(difficulty.name, []))
+            self.raw_by_difficulty[difficulty.name] = raw
+        return raw
+
+
+def file_key() -> (int, int):
+    stat = os.stat(highscore_filepath)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def cached() -> HighscoreCache:
+    # the parsed highscores, only read again if the file's mtime or size
+    # has changed since it was last read
+    global _cache
+    key = file_key()
+    if _cache is None or _cache.key != key:
+        _cache = HighscoreCache(key,
+                                convert_raw_to_real(load_raw_highscores()))
+    return _cache
+
+
+def load_raw_highscores(path: str = None) -> [[str, str, str]]:
     raw_highscore_data: [[str, str, str]] = []
+    if path is None:
+        path = highscore_filepath
 
     # read in data
-    with open('highscores.csv', 'r') as csvfile:
+    with open(path, 'r') as csvfile:
         reader = csv.reader(csvfile, delimiter=' ')
         for row in reader:
             # ignore blank lines
@@ -26,8 +72,8 @@ def load_raw_highscores() -> [[str, str, str]]:
 
 
 def load_real_highscores() -> [[Any, str, datetime.timedelta]]:
-    raw_highscore_data = load_raw_highscores()
-    return convert_raw_to_real(raw_highscore_data)
+    # a copy, callers add to it
+    return list(cached().highscore_data)
 
 
 def convert_raw_to_real(
@@ -70,15 +116,19 @@ def get_scores_for_difficulty(highscore_data: [[Any, str,
                               difficulty: Any) -> [datetime.timedelta]:
     # get only scores for the selected Difficulty level
     scores: [datetime.timedelta] = [x[2] for x in highscore_data
-                                    if x[0] == difficulty.name]
+                                    if x[0].name == difficulty.name]
 
     return scores
 
 
 def load_highscores_for_difficulty(difficulty: Any) \
         -> [Any, str, datetime.timedelta]:
-    return\
-        [x for x in load_real_highscores() if x[0].value == difficulty.value]
+    return list(cached().by_difficulty.get(difficulty.name, []))
+
+
+def load_raw_highscores_for_difficulty(difficulty: Any) \
+        -> [[str, str, str]]:
+    return list(cached().raw(difficulty))
 
 
 def add_and_save_scores(
@@ -98,12 +148,16 @@ def add_and_save_scores(
     from meeleymine import Difficulty
     # split into separate arrays per difficulty level
     total_list: [[[str, str, str]]] = []
+    real_list: [[[Any, str, datetime.timedelta]]] = []
     for difficulty in Difficulty:
         total_list.append([x for x in raw_highscore_data
                            if x[0] == difficulty.name])
+        real_list.append([x for x in highscore_data
+                          if x[0].name == difficulty.name])
 
     # save the newly adjusted highscores
-    with open('highscores.csv', 'w') as csvfile:
+    saved: [[Any, str, datetime.timedelta]] = []
+    with open(highscore_filepath, 'w') as csvfile:
         writer = csv.writer(csvfile, delimiter=' ')
         for idx, cat in enumerate(total_list):
             if not cat:
@@ -113,12 +167,19 @@ def add_and_save_scores(
             if idx == difficulty.value:
                 for hs in cat[:]:
                     writer.writerow(hs)
+                saved += real_list[idx]
             else:
                 for hs in cat[:max_scores]:
                     writer.writerow(hs)
+                saved += real_list[idx][:max_scores]
             # add a gap between each difficulty level
             writer.writerow('')
 
+    # what was just written is already parsed, so keep it instead of
+    # reading the file back in
+    global _cache
+    _cache = HighscoreCache(file_key(), saved)
+
 
 def generate_dummy() -> None:
     dummy = """BEGINNER AMELIA 00:01:47.776417
@@ -2,20 +2,24 @@
 import argparse
 import curses
 import datetime
-from enum import Enum
-import itertools
 import math
+import os
 import random
+import sys
 import time
-from typing import Any, List
 
+from engine import Cell, Difficulty, Engine, GameState, VISIBLE_CELLS
+import highscore_db
 import load_config
 import load_highscore
+from layout_queue import LayoutQueue
+import probability
+import solver
+from timer import format_time
 
 
 # TODO:
 # Features:
-# no 50/50s / solvable
 
 # Bugs:
 # recenter timer
@@ -37,68 +41,137 @@ import load_highscore
 # let user define own game modes other than the 3 basics
 
 
-class Difficulty(Enum):
-    BEGINNER = 0
-    INTERMEDIATE = 1
-    EXPERT = 2
-    CUSTOM = 3
-
-    def __lt__(self, other):
-        if self.__class__ is other.__class__:
-            return self.value < other.value
-        return NotImplemented
-
-
-class GameState(Enum):
-    PLAYING = 0
-    WON = 1
-    LOST = 2
-    PAUSED = 3
-
-
-class Cell(Enum):
-    BLANK = 0
-    ONE = 1  # BLUE
-    TWO = 2  # GREEN
-    THREE = 3  # RED
-    FOUR = 4  # NAVY
-    FIVE = 5  # MAROON
-    SIX = 6  # CYAN
-    SEVEN = 7  # BLACK
-    EIGHT = 8  # GRAY
-    MINE = 9
-    FLAG = 10
-    UNOPENED = 11
-    OPENED = 12
-
-    def display(self, win: curses.window, symbols: {str: str},
-                display_format=None) -> None:
-        if display_format:
-            win.addstr(symbols[self.name], display_format)
-        else:
-            color = curses.color_pair(int(self.value))
-            win.addstr(symbols[self.name], color)
+def display_cell(win: curses.window, cell: Cell, symbols: {str: str},
+                 display_format=None) -> None:
+    if display_format:
+        win.addstr(symbols[cell.name], display_format)
+    else:
+        color = curses.color_pair(int(cell.value))
+        win.addstr(symbols[cell.name], color)
 
-    def print(self, symbols):
-        return symbols[self.name]
 
-    def __le__(self, other):
-        if self.__class__ is other.__class__:
-            return self.value <= other.value
-        return NotImplemented
+# how a cell is highlighted, used to index the render table
+HIGHLIGHT_NONE = 0
+HIGHLIGHT_CURSOR = 1
+HIGHLIGHT_DEATH = 2
+HIGHLIGHT_WIN = 3
 
 
-def full(width: int, height: int, value: Any) -> [[Any]]:
-    return [[value for _ in range(width)] for _ in range(height)]
+def build_render_table(symbols: {str: str}) -> [[[((str, int),)]]]:
+    # every way a cell can be drawn, as runs of (text, attr), indexed by
+    # [wide][highlight][packed cell byte]. colors only get looked up here
+    # instead of for every cell on every frame, so init_colors has to have
+    # run first, and this has to be called again if the colors change
+    if curses.has_colors():
+        highlight_format = curses.A_BLINK
+    else:
+        highlight_format = curses.A_REVERSE
+    selector_format = (highlight_format
+                       | curses.color_pair(Board.str_to_id['SELECTOR'])
+                       | curses.A_BOLD)
+    death_format = (highlight_format
+                    | curses.color_pair(Board.str_to_id['LOSE'])
+                    | curses.A_BOLD)
+    win_format = (highlight_format
+                  | curses.color_pair(Board.str_to_id['WIN'])
+                  | curses.A_BOLD)
+    bracket_format = curses.color_pair(Board.str_to_id['BRACKETS'])
+
+    narrow = [[], [], [], []]
+    wide = [[], [], [], []]
+    for cell in VISIBLE_CELLS:
+        if cell is None:
+            # not a state the engine can be in
+            for table in narrow + wide:
+                table.append(())
+            continue
+        glyph = symbols[cell.name]
+        color = curses.color_pair(int(cell.value))
+        wide[HIGHLIGHT_NONE].append(
+            (('[', bracket_format), (glyph, color), (']', bracket_format)))
+        wide[HIGHLIGHT_CURSOR].append(
+            (('[', selector_format), (glyph, color), (']', selector_format)))
+        wide[HIGHLIGHT_DEATH].append(
+            (('[', death_format), (glyph, color), (']', death_format)))
+        wide[HIGHLIGHT_WIN].append(
+            (('[', win_format), (glyph, win_format), (']', win_format)))
+        narrow[HIGHLIGHT_NONE].append(((glyph, color),))
+        narrow[HIGHLIGHT_CURSOR].append(((glyph, curses.A_REVERSE),))
+        narrow[HIGHLIGHT_DEATH].append(((glyph, color),))
+        narrow[HIGHLIGHT_WIN].append(((glyph, win_format),))
+    return [narrow, wide]
+
+
+def overlay_glyph(p: float) -> str:
+    # one character for the chance of a mine: '.' for certainly safe,
+    # '!' for certainly a mine, otherwise tenths rounded down
+    if p <= 0:
+        return '.'
+    if p >= 1:
+        return '!'
+    return str(min(9, int(p * 10)))
+
+
+def ansi_colors(colors: {str: dict}) -> {str: str}:
+    # SGR parameters for each named color, BG as a background and the rest
+    # as foregrounds. the RGB palette is used where it is set, otherwise
+    # the same default color numbers as curses
+    defaults: {str, int} = colors['DEFAULT']
+    rgbs: {str: [int]} = colors['RGB']
+    sgr = {}
+    for c_n in Board.str_to_id:
+        ground = '48' if c_n == 'BG' else '38'
+        if rgbs.get(c_n):
+            # curses wants 0-1000, the terminal wants 0-255
+            sgr[c_n] = f'{ground};2;' + ';'.join(
+                str(round(v * 255 / 1000)) for v in rgbs[c_n])
+        elif defaults.get(c_n) is None or defaults[c_n] < 0:
+            sgr[c_n] = '49' if c_n == 'BG' else '39'
+        else:
+            sgr[c_n] = f'{ground};5;{defaults[c_n]}'
+    return sgr
+
+
+def build_ansi_table(sgr: {str: str},
+                     symbols: {str: str}) -> [[[((str, str),)]]]:
+    # the same as build_render_table, but the attr of each run is the SGR
+    # parameters to draw it with, for writing straight to the terminal.
+    # each one sets bold, blink and reverse itself so no reset is needed
+    # between runs, the background is set once per row
+    plain = '22;25;27;'
+    highlight = '1;5;27;'
+    selector_format = highlight + sgr['SELECTOR']
+    death_format = highlight + sgr['LOSE']
+    win_format = highlight + sgr['WIN']
+    bracket_format = plain + sgr['BRACKETS']
+
+    narrow = [[], [], [], []]
+    wide = [[], [], [], []]
+    for cell in VISIBLE_CELLS:
+        if cell is None:
+            # not a state the engine can be in
+            for table in narrow + wide:
+                table.append(())
+            continue
+        glyph = symbols[cell.name]
+        color = plain + sgr.get(cell.name, sgr['FG'])
+        wide[HIGHLIGHT_NONE].append(
+            (('[', bracket_format), (glyph, color), (']', bracket_format)))
+        wide[HIGHLIGHT_CURSOR].append(
+            (('[', selector_format), (glyph, color), (']', selector_format)))
+        wide[HIGHLIGHT_DEATH].append(
+            (('[', death_format), (glyph, color), (']', death_format)))
+        wide[HIGHLIGHT_WIN].append(
+            (('[', win_format), (glyph, win_format), (']', win_format)))
+        narrow[HIGHLIGHT_NONE].append(((glyph, color),))
+        narrow[HIGHLIGHT_CURSOR].append(
+            ((glyph, '7;22;25;' + sgr['FG']),))
+        narrow[HIGHLIGHT_DEATH].append(((glyph, color),))
+        narrow[HIGHLIGHT_WIN].append(((glyph, win_format),))
+    return [narrow, wide]
 
 
 class Board:
-    neighbors = [x for x in itertools.product(range(-1, 2),
-                                              range(-1, 2)) if x != (0, 0)]
-    zero_time = datetime.datetime.today().replace(hour=0,
-                                                  minute=0,
-                                                  second=0,
-                                                  microsecond=0)
     str_to_id = {'ONE': 1,
                  'TWO': 2,
                  'THREE': 3,
@@ -116,20 +189,19 @@ class Board:
                  'BG': 15,
                  'FG': 16,
                  'BRACKETS': 17}
+    # rows under the board: a gap, 3 lines of win/lose text and the help.
+    # one more for the no guess notice when NO_GUESS is on
+    footer_height = 5
 
     def __init__(self, width: int, height: int, mine_ratio: float,
                  difficulty: Difficulty, config: dict,
                  win: curses.window) -> None:
         self.width = width
         self.height = height
-        self.locations = list(itertools.product(range(self.height),
-                                                range(self.width)))
         self.full_width = self.width * 3
 
         self.mine_ratio = mine_ratio
         self.n_mines = round(self.width * self.height * self.mine_ratio)
-        self.mines = []
-        self.moves = []
 
         self.difficulty = difficulty
         self.config = config
@@ -137,127 +209,110 @@ class Board:
         self.hs_config = config['HIGHSCORES']
         self.symbols = config["LOOK"]["SYMBOLS"]
 
-        self.win = win
-
-        self.start_time = None
-        self.end_time = None
-        self.cum_time = datetime.timedelta(0)
-        self.score = datetime.timedelta(0)
+        # with the ansi renderer the board skips curses entirely and is
+        # written straight to the terminal, everything else is still curses
+        self.ansi = config.get('RENDERER') == 'ansi'
+        if self.ansi:
+            sgr = ansi_colors(config['LOOK']['COLORS'])
+            self.ansi_bg = sgr['BG']
+            self.render_table = build_ansi_table(sgr, self.symbols)
+        else:
+            self.render_table = build_render_table(self.symbols)
+        # board rows waiting to be written by the ansi renderer
+        self.ansi_rows = set()
 
-        self.real_board = full(self.width, self.height, Cell.BLANK)
-        self.my_board = full(self.width, self.height, Cell.UNOPENED)
-        self.cursor = (self.height // 2, self.width // 2)
-        self.death = (-1, -1)
-        self.is_first_click = True
+        self.win = win
 
-        self.state = GameState.PLAYING
-        self.previous_state = self.state
+        # layouts for the next games are made in the background so the
+        # first click never waits. seeded games make their own, so they
+        # come out the same every time
+        if config['SEED'] is None:
+            layouts = LayoutQueue(self.width, self.height, self.n_mines,
+                                  open_start=config['SETUP']['OPEN_START'],
+                                  no_guess=config['SETUP']['NO_GUESS'])
+        else:
+            layouts = None
+
+        # all the game rules live in the engine, the board just draws it
+        self.engine = Engine(self.width, self.height, self.n_mines,
+                             open_start=config['SETUP']['OPEN_START'],
+                             chording=config['SETUP']['CHORDING'],
+                             lock_flags=config['SETUP']['LOCK_FLAGS'],
+                             no_guess=config['SETUP']['NO_GUESS'],
+                             layouts=layouts)
+        self._cursor = (self.height // 2, self.width // 2)
+
+        # cells that changed since the last frame, and whether everything
+        # has to be repainted instead
+        self.dirty = set()
+        self.needs_redraw = True
+
+        # the board is drawn into a pad and only the part of it that fits
+        # on the terminal is shown. viewport is the visible
+        # (top row, left col, rows, cols, cell width)
+        self.pad = None
+        self.viewport = (0, 0, self.height, self.width, 3)
+        # column the clock is drawn at, None if it doesn't fully fit
+        self.timer_col = None
+        # {(row, col): chance of a mine} while the overlay is on
+        self.probabilities = None
+
+    @property
+    def cursor(self) -> (int, int):
+        return self._cursor
+
+    @cursor.setter
+    def cursor(self, loc: (int, int)) -> None:
+        # both the old and the new cursor position need repainting
+        self.dirty.add(self._cursor)
+        self.dirty.add(loc)
+        self._cursor = loc
+
+    @property
+    def state(self) -> GameState:
+        return self.engine.state
+
+    @property
+    def score(self) -> datetime.timedelta:
+        # the highscores are kept as timedeltas
+        return datetime.timedelta(microseconds=self.engine.score)
 
     def reset(self) -> None:
-        self.mines = []
-        self.moves = []
-
-        self.start_time = None
-        self.end_time = None
-        self.cum_time = datetime.timedelta(0)
-        self.score = datetime.timedelta(0)
-
-        self.real_board = full(self.width, self.height, Cell.BLANK)
-        self.my_board = full(self.width, self.height, Cell.UNOPENED)
-        self.cursor = (self.height // 2, self.width // 2)
-        self.death = (-1, -1)
-        self.is_first_click = True
-
-        self.state = GameState.PLAYING
-        self.previous_state = self.state
-
         if self.config['SEED'] is not None:
             random.seed(self.config['SEED'])
 
+        self.engine.reset()
+        self.cursor = (self.height // 2, self.width // 2)
+        self.needs_redraw = True
+        if self.probabilities is not None:
+            self.update_probabilities()
+
         # flash on reset
         if not self.no_flash:
             curses.flash()
 
     def pause(self) -> None:
-        if self.state == GameState.PAUSED:
-            # unpause
-            if not self.is_first_click:
-                self.start_time = datetime.datetime.now()
-            self.state = self.previous_state
-        else:
-            # pause
-            if not self.is_first_click:
-                self.cum_time += (datetime.datetime.now() - self.start_time)
-            self.previous_state = self.state
-            self.state = GameState.PAUSED
+        self.engine.pause()
+        self.needs_redraw = True
 
-    def in_bounds(self, coord: (int, int)) -> bool:
-        row, col = coord
-        return 0 <= row < self.height and 0 <= col < self.width
-
-    def count_mines(self, row: int, col: int) -> int:
-        total = 0
-        for n in Board.neighbors:
-            loc = (row + n[0], col + n[1])
-            if self.in_bounds(loc):
-                total += self.real_board[loc[0]][loc[1]] == Cell.MINE
-        return total
-
-    def first_empty(self, locations: [(int, int)]) -> (int, int):
-        for rid, row in enumerate(self.real_board):
-            for cid, cell in enumerate(row):
-                if (cell == Cell.BLANK
-                        and (rid, cid) not in locations):
-                    return rid, cid
-        raise Exception('No where to move mines to!')
-
-    def open_opening(self) -> None:
-        # move all mines in adjacent squares
-        locations = []
-        for n_r, n_c in Board.neighbors:
-            r = n_r + self.cursor[0]
-            c = n_c + self.cursor[1]
-            locations.append((r, c))
-        locations.append(self.cursor)
-        for r, c in locations:
-            if self.in_bounds((r, c)):
-                if self.real_board[r][c] == Cell.MINE:
-                    self.mines.remove((r, c))
-                    self.real_board[r][c] = Cell.BLANK
-                    ro, co = self.first_empty(locations)
-                    self.real_board[ro][co] = Cell.MINE
-                    self.mines.append((ro, co))
-
-    def populate(self) -> None:
-        # set mines
-        choices = [x for x in self.locations if x != self.cursor]
-        if self.n_mines <= len(choices):
-            self.mines = random.sample(choices, k=self.n_mines)
-            for m_row, m_col in self.mines:
-                self.real_board[m_row][m_col] = Cell.MINE
-        else:
-            for m_row, m_col in self.locations:
-                self.mines.append((m_row, m_col))
-                self.real_board[m_row][m_col] = Cell.MINE
-
-        if self.config['SETUP']['OPEN_START']:
-            self.open_opening()
+    def close(self) -> None:
+        # stops making layouts, for when this board won't be played again
+        if self.engine.layouts is not None:
+            self.engine.layouts.close()
 
-        # populate numbers
-        for loc in self.locations:
-            cell = self.real_board[loc[0]][loc[1]]
-            if cell == Cell.BLANK:
-                self.real_board[loc[0]][loc[1]] = Cell(self.count_mines(*loc))
-
-        self.start_time = datetime.datetime.now()
+    def in_bounds(self, coord: (int, int)) -> bool:
+        return self.engine.in_bounds(coord)
 
     def set_cursor_from_mouse(self, screen_x: int, screen_y: int) -> bool:
         if not self.state == GameState.PLAYING:
             return False
         # x and y are screen coordinates
-        new_row = screen_y - 1  # two for timer
-        new_col = (screen_x // 3)  # to account for [ ] style
-        loc = (new_row, new_col)
+        top, left, rows, cols, cell_width = self.viewport
+        screen_row = screen_y - 1  # one for timer
+        screen_col = screen_x // cell_width  # to account for [ ] style
+        if not (0 <= screen_row < rows and 0 <= screen_col < cols):
+            return False
+        loc = (top + screen_row, left + screen_col)
         if self.in_bounds(loc) and self.state == GameState.PLAYING:
             self.cursor = loc
             return True
@@ -296,25 +351,31 @@ class Board:
             self.cursor = (self.height - 1, self.cursor[1])
 
     def update_highscores(self) -> bool:
-        term_width, term_height = self.win.getmaxyx()
-        if term_width > self.full_width:
-            w = self.full_width
-        else:
-            w = self.width
+        term_height, term_width = self.win.getmaxyx()
+        w = self.text_width()
         new_highscore = False
 
-        # read in data
-        real_highscores = load_highscore.load_real_highscores()
-
-        # get only scores for the selected Difficulty level
-        scores = load_highscore.get_scores_for_difficulty(real_highscores,
-                                                          self.difficulty)
-
-        # check if current score is better than any score in highscore list
         max_scores = self.hs_config.get(self.difficulty.name + '_MAX')
-        if (any(self.score < s for s in scores)  # higher than any value
-                or scores is None  # or list is empty
-                or len(scores) < max_scores):  # or list is not full
+        use_db = self.hs_config['STORAGE'] == 'sqlite'
+        if use_db:
+            # one indexed lookup instead of reading every score
+            qualifies = highscore_db.qualifies(self.difficulty, self.score,
+                                               max_scores)
+        else:
+            # read in data, these are kept parsed until the file changes
+            real_highscores = load_highscore.load_real_highscores()
+
+            # get only scores for the selected Difficulty level
+            scores = [x[2] for x in
+                      load_highscore.load_highscores_for_difficulty(
+                          self.difficulty)]
+
+            # check if current score is better than any score in highscore
+            # list
+            qualifies = (any(self.score < s for s in scores)  # higher
+                         or scores is None  # or list is empty
+                         or len(scores) < max_scores)  # or list is not full
+        if qualifies:
             # NEW HIGH SCORE!
             new_highscore = True
 
@@ -324,8 +385,8 @@ class Board:
                             curses.A_BOLD
                             | curses.A_REVERSE
                             | curses.A_BLINK)
-            name = raw_input(self.win, self.height + 7, 0,
-                             prompt='Enter Name:')
+            prompt_row = min(self.viewport[2] + 7, term_height - 2)
+            name = raw_input(self.win, prompt_row, 0, prompt='Enter Name:')
             # remove invalid characters (white spaces and quotes)
             name = name.translate(str.maketrans('', '', ' \n\t\r\'"'))
             # force uppercase and enforce name char limit
@@ -335,31 +396,28 @@ class Board:
             else:
                 name = name.upper()
 
-            load_highscore.add_and_save_scores(real_highscores,
-                                               self.difficulty, name,
-                                               self.score, max_scores)
+            if use_db:
+                highscore_db.add_score(self.difficulty, name, self.score,
+                                       max_scores)
+            else:
+                load_highscore.add_and_save_scores(real_highscores,
+                                                   self.difficulty, name,
+                                                   self.score, max_scores)
         return new_highscore
 
     def write_game(self) -> None:
         out = 'Mines:\n'
-        for m in self.mines:
+        for m in self.engine.mines:
             out += f'{m}\n'
         out += '\n'
         out += 'Moves:\n'
-        for m in self.moves:
+        for m in self.engine.moves:
             out += f'{m}\n'
 
         with open('game_history.txt', 'w+') as f:
             f.write(out)
 
     def won(self) -> None:
-        self.state = GameState.WON
-        self.end_time = datetime.datetime.now()
-
-        self.score = self.cum_time + (self.end_time - self.start_time)
-        for m in self.mines:
-            self.my_board[m[0]][m[1]] = Cell.FLAG
-
         # Update highscores
         if self.config['SEED'] is None:
             new_highscore = self.update_highscores()
@@ -369,23 +427,7 @@ class Board:
         # write out game:
         self.write_game()
 
-    def check_win(self) -> None:
-        if self.state != GameState.PLAYING:
-            return
-        won = sum(x.count(Cell.UNOPENED) + x.count(Cell.FLAG) for x in
-                  self.my_board) == self.n_mines
-        if won:
-            self.won()
-
-    def reveal_all(self) -> None:
-        self.my_board = full(self.width, self.height, Cell.OPENED)
-
     def lose(self) -> None:
-        self.state = GameState.LOST
-        self.end_time = datetime.datetime.now()
-
-        self.reveal_all()
-        self.death = self.cursor
         if not self.no_flash:
             curses.flash()
             time.sleep(0.1)
@@ -395,82 +437,38 @@ class Board:
         # write out game:
         self.write_game()
 
-    def surrounding_flags(self, row: int, col: int) -> int:
-        count = 0
-        for n_r, n_c in Board.neighbors:
-            if (self.in_bounds((n_r + row, n_c + col))
-                    and self.my_board[n_r + row][n_c + col] == Cell.FLAG):
-                count += 1
-        return count
-
-    def reveal(self, auto: bool = False) -> None:
-        if not self.state == GameState.PLAYING:
-            return
-        if not self.in_bounds(self.cursor):
-            return
-
-        if self.is_first_click:
-            self.populate()
-            self.is_first_click = False
-
-        row, col = self.cursor
-
-        if isinstance(self.cursor, tuple):
-            self.moves.append(self.cursor)
-
-        # chording
-        if (self.config['SETUP']['CHORDING']
-                and Cell.ONE.value <= self.real_board[row][col].value <=
-                Cell.EIGHT.value
-                and self.my_board[row][col] == Cell.OPENED
-                and not auto):
-            if (self.surrounding_flags(row, col)
-                    == self.real_board[row][col].value):
-                # chord
-                # recursively reveal 8 surrounding cells
-                # * that are not flags
-                temp = self.cursor
-                for n in Board.neighbors:
-                    self.cursor = [sum(x) for x in zip((row, col), n)]
-                    if (self.in_bounds(self.cursor)
-                            and self.my_board[self.cursor[0]][
-                                self.cursor[1]] !=
-                            Cell.FLAG):
-                        self.reveal(auto=True)
-                self.cursor = temp
-
-        if self.my_board[row][col] == Cell.OPENED:
-            return
-
-        if (self.config['SETUP']['LOCK_FLAGS']
-            and self.my_board[row][col] == Cell.FLAG):
+    def reveal(self) -> None:
+        before = self.state
+        first_click = self.engine.is_first_click
+        self.dirty.update(self.engine.reveal(*self.cursor))
+        if before != GameState.PLAYING:
             return
-
-        if self.real_board[row][col] == Cell.MINE:
+        if first_click and self.engine.no_guess:
+            # says below the board if this one might need a guess
+            self.needs_redraw = True
+        if self.probabilities is not None:
+            self.update_probabilities()
+        if self.state == GameState.WON:
+            self.won()
+            self.needs_redraw = True
+        elif self.state == GameState.LOST:
             self.lose()
-            return
-
-        if self.real_board[row][col] == Cell.BLANK:
-            self.my_board[row][col] = Cell.OPENED
-            # recursively reveal 8 surrounding cells
-            temp = self.cursor
-            for n in Board.neighbors:
-                self.cursor = [sum(x) for x in zip((row, col), n)]
-                self.reveal(auto=True)
-            self.cursor = temp
-        else:
-            self.my_board[row][col] = Cell.OPENED
-        self.check_win()
-        return
+            self.needs_redraw = True
 
     def show_highscores(self) -> None:
         self.pause()
 
         # read in data
-        highscores: [Difficulty, str, datetime.timedelta] = (
-            load_highscore.load_highscores_for_difficulty(self.difficulty))
-
-        highscores = load_highscore.convert_real_to_raw(highscores)
+        highscores: [[str, str, str]]
+        if self.hs_config['STORAGE'] == 'sqlite':
+            highscores = load_highscore.convert_real_to_raw(
+                highscore_db.load_highscores_for_difficulty(
+                    self.difficulty,
+                    self.hs_config[f'{self.difficulty.name}_MAX']))
+        else:
+            # already parsed and formatted, unless the file has changed
+            highscores = load_highscore.load_raw_highscores_for_difficulty(
+                self.difficulty)
 
         max_scores = self.hs_config[f'{self.difficulty.name}_MAX']
         if max_scores == math.inf:
@@ -498,7 +496,7 @@ class Board:
 
             # if we are showing the highscores after someone got a new one
             # then we will do our best to highlight their new score
-            if f'{Board.zero_time + self.score:%H:%M:%S.%f}' == score[2]:
+            if format_time(self.engine.score) == score[2]:
                 self.win.addstr(
                     f'{score[1]:<{max_name_length}} | {score[2]}\n',
                     title_format)
@@ -511,181 +509,278 @@ class Board:
         self.win.nodelay(True)
         self.pause()
 
-    def count_flags(self) -> int:
-        count = 0
-        for r, c in self.locations:
-            if self.my_board[r][c] == Cell.FLAG:
-                count += 1
-        return count
-
     def flag(self) -> None:
-        if self.state != GameState.PLAYING:
+        self.engine.flag(*self.cursor)
+        self.dirty.add(self.cursor)
+
+    def update_probabilities(self) -> None:
+        # one move can change the odds anywhere on the board, so the whole
+        # thing gets repainted
+        self.probabilities = probability.probabilities(self.engine)
+        self.needs_redraw = True
+
+    def toggle_overlay(self) -> None:
+        # shows the chance of a mine on each unopened cell, or stops
+        if self.probabilities is None:
+            self.update_probabilities()
+        else:
+            self.probabilities = None
+            self.needs_redraw = True
+
+    def hint(self) -> None:
+        # moves the cursor to the nearest cell that is certainly safe,
+        # flashes if there isn't one and the next move has to be a guess
+        if self.state != GameState.PLAYING or self.engine.is_first_click:
             return
-        if not self.in_bounds(self.cursor):
+        loc = solver.hint(self.engine, self.cursor)
+        if loc is not None:
+            self.cursor = loc
+        elif not self.no_flash:
+            curses.flash()
+
+    def next_tick(self) -> int:
+        # milliseconds until the clock shows a new value, -1 if it is stopped
+        return self.engine.timer.next_change()
+
+    def text_width(self) -> int:
+        # width of the lines above and below the board, never wider than
+        # the terminal
+        term_height, term_width = self.win.getmaxyx()
+        if term_width > self.full_width:
+            w = self.full_width
+        else:
+            w = self.width
+        return min(w, term_width - 1)
+
+    def display_header(self) -> None:
+        # the mine count and the clock, on the top line
+        term_height, term_width = self.win.getmaxyx()
+        remaining = self.engine.remaining_mines
+        count_str = f'Count: {remaining}|'
+        remaining_size = (len(str(remaining)) + 8)
+        if self.full_width - remaining_size < 0:
+            remaining_size = 0
+        w = max(0, self.text_width() - remaining_size)
+        # show timer next
+        time_str = f'|{format_time(self.engine.elapsed(), 2)}'
+        # cut off anything that would wrap onto the board
+        header = f'{count_str}{time_str:>{w}}'[:term_width - 1]
+        self.win.addstr(0, 0, f'{header}\n')
+        # where the clock starts, so display_timer can redraw just that
+        self.timer_col = len(count_str) + max(0, w - len(time_str))
+        if self.timer_col + len(time_str) > len(header):
+            # some of it got cut off
+            self.timer_col = None
+
+    def display_timer(self) -> None:
+        # redraws only the clock, for when nothing else has changed
+        time_str = f'|{format_time(self.engine.elapsed(), 2)}'
+        if self.timer_col is None:
+            self.display_header()
             return
+        self.win.addstr(0, self.timer_col, time_str)
+
+    def update_viewport(self) -> bool:
+        # scrolls the visible part of the board so the cursor stays on
+        # screen. returns True if what is visible has changed
+        term_height, term_width = self.win.getmaxyx()
+        if term_width > self.full_width:
+            cell_width = 3
+        else:
+            cell_width = 1
+        footer = Board.footer_height + (1 if self.engine.no_guess else 0)
+        rows = max(1, min(self.height, term_height - 1 - footer))
+        cols = max(1, min(self.width, term_width // cell_width))
 
+        top, left = self.viewport[:2]
         row, col = self.cursor
-        if self.my_board[row][col] == Cell.UNOPENED:
-            self.my_board[row][col] = Cell.FLAG
+        if row < top:
+            top = row
+        elif row >= top + rows:
+            top = row - rows + 1
+        if col < left:
+            left = col
+        elif col >= left + cols:
+            left = col - cols + 1
+        top = max(0, min(top, self.height - rows))
+        left = max(0, min(left, self.width - cols))
+
+        viewport = (top, left, rows, cols, cell_width)
+        if self.ansi:
+            # nothing to allocate, rows are built when they are written
+            changed = viewport != self.viewport
+            self.viewport = viewport
+            return changed
+        if self.pad is None or cell_width != self.viewport[4]:
+            # one extra row and col so writing the last cell can't fail
+            self.pad = curses.newpad(self.height + 1,
+                                     self.width * cell_width + 1)
+            self.viewport = viewport
+            return True
+        changed = viewport != self.viewport
+        self.viewport = viewport
+        return changed
+
+    def refresh_pad(self) -> None:
+        # queues the visible part of the pad to be drawn under the header.
+        # win has to go first, otherwise it paints over the board
+        top, left, rows, cols, cell_width = self.viewport
+        self.win.noutrefresh()
+        if self.ansi:
+            # curses doesn't know about the board, so it has to finish
+            # drawing first or it would paint over it
+            curses.doupdate()
+            self.write_ansi()
             return
-        if self.my_board[row][col] == Cell.FLAG:
-            self.my_board[row][col] = Cell.UNOPENED
+        self.pad.noutrefresh(top, left * cell_width, 1, 0,
+                             rows, cols * cell_width - 1)
+
+    def display_viewport(self) -> None:
+        # paints every visible cell into the pad, nothing else
+        top, left, rows, cols, cell_width = self.viewport
+        if self.ansi:
+            self.ansi_rows.update(range(top, top + rows))
             return
+        for rid in range(top, top + rows):
+            self.pad.move(rid, left * cell_width)
+            self.display_row(rid, left, cols, cell_width == 3)
+
+    def cell_runs(self, rid: int, cid: int, wide: bool) -> ((str, int),):
+        # the (text, attr) runs that make up a single cell
+        cell = self.engine.cells[rid * self.width + cid]
+        if self.cursor == (rid, cid) and self.state == GameState.PLAYING:
+            # highlight cursor position
+            highlight = HIGHLIGHT_CURSOR
+        elif self.engine.death == (rid, cid) and self.state == GameState.LOST:
+            # highlight death location
+            highlight = HIGHLIGHT_DEATH
+        elif (VISIBLE_CELLS[cell] == Cell.FLAG
+              and self.state == GameState.WON):
+            # flash all flags if won
+            highlight = HIGHLIGHT_WIN
+        else:
+            highlight = HIGHLIGHT_NONE
+        runs = self.render_table[wide][highlight][cell]
+        if (self.probabilities is not None
+                and VISIBLE_CELLS[cell] == Cell.UNOPENED):
+            # swap the glyph for the odds, keeping the colors
+            p = self.probabilities.get((rid, cid))
+            if p is not None:
+                runs = list(runs)
+                g = 1 if wide else 0
+                runs[g] = (overlay_glyph(p), runs[g][1])
+        return runs
+
+    def display_cell_at(self, rid: int, cid: int, wide: bool) -> None:
+        # draws a single cell wherever the pad's cursor is
+        for text, attr in self.cell_runs(rid, cid, wide):
+            self.pad.addstr(text, attr)
+
+    def display_row(self, rid: int, left: int, cols: int,
+                    wide: bool) -> None:
+        # draws part of a row wherever the pad's cursor is. neighboring
+        # runs with the same attr are joined so each gets one addstr
+        pieces = []
+        run_attr = None
+        for cid in range(left, left + cols):
+            for text, attr in self.cell_runs(rid, cid, wide):
+                if attr != run_attr and pieces:
+                    self.pad.addstr(''.join(pieces), run_attr)
+                    pieces = []
+                pieces.append(text)
+                run_attr = attr
+        if pieces:
+            self.pad.addstr(''.join(pieces), run_attr)
+
+    def ansi_row(self, rid: int, left: int, cols: int, wide: bool) -> str:
+        # part of a row as text with SGR escapes, only emitting one when
+        # the attr actually changes
+        pieces = [f'\x1b[0;{self.ansi_bg}m']
+        run_attr = None
+        for cid in range(left, left + cols):
+            for text, attr in self.cell_runs(rid, cid, wide):
+                if attr != run_attr:
+                    pieces.append(f'\x1b[{attr}m')
+                    run_attr = attr
+                pieces.append(text)
+        return ''.join(pieces)
+
+    def write_ansi(self) -> None:
+        # sends every pending row that is on screen to the terminal in one
+        # write. the cursor and attributes are saved and restored around
+        # it so curses' idea of them stays right
+        if not self.ansi_rows:
+            return
+        top, left, rows, cols, cell_width = self.viewport
+        out = ['\x1b7']
+        for rid in sorted(self.ansi_rows):
+            if not top <= rid < top + rows:
+                continue
+            # the board starts on the second line, escapes count from 1
+            out.append(f'\x1b[{rid - top + 2};1H')
+            out.append(self.ansi_row(rid, left, cols, cell_width == 3))
+        out.append('\x1b[0m\x1b8')
+        self.ansi_rows.clear()
+        # a write to a tty can stop partway, say when a resize signal
+        # comes in, so keep going until all of it is out. otherwise the
+        # terminal is left in the middle of an escape
+        data = memoryview(''.join(out).encode())
+        fd = sys.stdout.fileno()
+        while data:
+            data = data[os.write(fd, data):]
 
     def display(self) -> None:
-        if curses.has_colors():
-            selector_format = (curses.A_BLINK
-                               | curses.color_pair(Board.str_to_id[
-                                                       'SELECTOR'])
-                               | curses.A_BOLD)
-            death_format = (curses.A_BLINK
-                            | curses.color_pair(Board.str_to_id[
-                                                    'LOSE'])
-                            | curses.A_BOLD)
-            win_format = (curses.A_BLINK
-                          | curses.color_pair(Board.str_to_id[
-                                                  'WIN'])
-                          | curses.A_BOLD)
-        else:
-            selector_format = (curses.A_REVERSE
-                               | curses.color_pair(Board.str_to_id[
-                                                       'SELECTOR'])
-                               | curses.A_BOLD)
-            death_format = (curses.A_REVERSE
-                            | curses.color_pair(Board.str_to_id[
-                                                    'LOSE'])
-                            | curses.A_BOLD)
-            win_format = (curses.A_REVERSE
-                          | curses.color_pair(Board.str_to_id[
-                                                  'WIN'])
-                          | curses.A_BOLD)
+        self.update_viewport()
+        w = self.text_width()
+        self.display_header()
+        title_format = curses.A_BOLD | curses.A_REVERSE | curses.A_BLINK
 
-        term_height, term_width = self.win.getmaxyx()
-        remaining = self.n_mines - self.count_flags()
-        self.win.addstr(f'Count: {remaining}|')
-        remaining_size = (len(str(remaining)) + 8)
-        if term_width > self.full_width:
-            if self.full_width - remaining_size < 0:
-                remaining_size = 0
-            # show timer next
-            if self.start_time is not None and self.state == GameState.PLAYING:
-                _time = Board.zero_time + self.cum_time + (
-                        datetime.datetime.now() - self.start_time)
-            elif self.state == GameState.WON or self.state == GameState.LOST:
-                _time = Board.zero_time + self.cum_time + (
-                        self.end_time - self.start_time)
-            else:
-                _time = Board.zero_time + self.cum_time
-
-            title_format = curses.A_BOLD | curses.A_REVERSE | curses.A_BLINK
-            time_str = f'|{_time:%H:%M:%S.%f}'[:-4]
-            self.win.addstr(f''
-                            f'{time_str:>{self.full_width - remaining_size}}\n')
-
-            # display board
-            for rid, row in enumerate(self.my_board):
-                for cid, cell in enumerate(row):
-                    if cell == Cell.OPENED:
-                        cell = self.real_board[rid][cid]
-                    # highlight cursor position
-                    if self.cursor == (
-                            rid, cid) and self.state == GameState.PLAYING:
-                        self.win.addstr('[', selector_format)
-                        cell.display(self.win, self.symbols)
-                        self.win.addstr(']', selector_format)
-                        continue
-                    # highlight death location
-                    if self.death == (
-                            rid, cid) and self.state == GameState.LOST:
-                        self.win.addstr('[', death_format)
-                        cell.display(self.win, self.symbols)
-                        self.win.addstr(']', death_format)
-                        continue
-                    # flash all flags if won
-                    if cell == Cell.FLAG and self.state == GameState.WON:
-                        self.win.addstr('[', win_format)
-                        cell.display(self.win, self.symbols, win_format)
-                        self.win.addstr(']', win_format)
-                        continue
-                    # otherwise normal cell display
-                    self.win.addstr('[', curses.color_pair(Board.str_to_id['BRACKETS']))
-                    cell.display(self.win, self.symbols)
-                    self.win.addstr(']', curses.color_pair(Board.str_to_id['BRACKETS']))
-                self.win.addstr('\n')
-            self.win.addstr('\n')
-
-            reset_key = control_str(self.config["CONTROLS"]["RESET"])
-            menu_key = control_str(self.config["CONTROLS"]["MENU"])
-            if self.state == GameState.LOST:
-                self.win.addstr(f'{"YOU LOSE!":^{self.full_width}}\n',
-                                title_format)
-                self.win.addstr(
-                    f'{f"Press {reset_key} to reset.":^{self.full_width}}\n')
-                self.win.addstr(
-                    f'{f"Press {menu_key} to return to menu.":^{self.full_width}}\n')
-            elif self.state == GameState.WON:
-                self.win.addstr(f'{"YOU WIN!":^{self.full_width}}\n',
-                                title_format)
-                self.win.addstr(
-                    f'{f"Press {reset_key} to reset.":^{self.full_width}}\n')
-                self.win.addstr(
-                    f'{f"Press {menu_key} to return to menu.":^{self.full_width}}\n')
+        # display board
+        self.display_viewport()
+        self.win.move(1 + self.viewport[2], 0)
+        self.win.addstr('\n')
+
+        if (self.engine.no_guess and not self.engine.is_first_click
+                and not self.engine.guess_free):
+            self.win.addstr(f'{"No guess free board found.":^{w}.{w}}\n')
+
+        reset_key = control_str(self.config["CONTROLS"]["RESET"])
+        menu_key = control_str(self.config["CONTROLS"]["MENU"])
+        if self.state == GameState.LOST:
+            self.win.addstr(f'{"YOU LOSE!":^{w}.{w}}\n', title_format)
+            self.win.addstr(f'{f"Press {reset_key} to reset.":^{w}.{w}}\n')
+            self.win.addstr(
+                f'{f"Press {menu_key} to return to menu.":^{w}.{w}}\n')
+        elif self.state == GameState.WON:
+            self.win.addstr(f'{"YOU WIN!":^{w}.{w}}\n', title_format)
+            self.win.addstr(f'{f"Press {reset_key} to reset.":^{w}.{w}}\n')
+            self.win.addstr(
+                f'{f"Press {menu_key} to return to menu.":^{w}.{w}}\n')
+
+        self.dirty.clear()
+        self.needs_redraw = False
+        self.refresh_pad()
+
+    def display_dirty(self) -> None:
+        # repaints the header and only the cells that changed since the
+        # last frame, everything else is left as it is on screen
+        self.display_header()
+        if self.update_viewport():
+            # the board scrolled, so everything on screen is new
+            self.display_viewport()
         else:
-            if self.full_width - remaining_size < 0:
-                remaining_size = 0
-            # show timer next
-            if self.start_time is not None and self.state == GameState.PLAYING:
-                _time = Board.zero_time + self.cum_time + (
-                        datetime.datetime.now() - self.start_time)
-            elif self.state == GameState.WON or self.state == GameState.LOST:
-                _time = Board.zero_time + self.cum_time + (
-                        self.end_time - self.start_time)
-            else:
-                _time = Board.zero_time + self.cum_time
-
-            title_format = curses.A_BOLD | curses.A_REVERSE | curses.A_BLINK
-            time_str = f'|{_time:%H:%M:%S.%f}'[:-4]
-            self.win.addstr(f'{time_str:>{self.width - remaining_size}}\n')
-
-            # display board
-            for rid, row in enumerate(self.my_board):
-                for cid, cell in enumerate(row):
-                    if cell == Cell.OPENED:
-                        cell = self.real_board[rid][cid]
-                    # highlight cursor position
-                    if self.cursor == (
-                            rid, cid) and self.state == GameState.PLAYING:
-                        cell.display(self.win, self.symbols, curses.A_REVERSE)
-                        continue
-                    # highlight death location
-                    if self.death == (
-                            rid, cid) and self.state == GameState.LOST:
-                        cell.display(self.win, self.symbols)
-                        continue
-                    # flash all flags if won
-                    if cell == Cell.FLAG and self.state == GameState.WON:
-                        cell.display(self.win, self.symbols, win_format)
-                        continue
-                    # otherwise normal cell display
-                    cell.display(self.win, self.symbols)
-                self.win.addstr('\n')
-            self.win.addstr('\n')
-
-            reset_key = control_str(self.config["CONTROLS"]["RESET"])
-            menu_key = control_str(self.config["CONTROLS"]["MENU"])
-            if self.state == GameState.LOST:
-                self.win.addstr(f'{"YOU LOSE!":^{self.width}}\n',
-                                title_format)
-                self.win.addstr(
-                    f'{f"Press {reset_key} to reset.":^{self.width}}\n')
-                self.win.addstr(f'{f"Press {menu_key} to return to menu.":^{self.width}}\n')
-            elif self.state == GameState.WON:
-                self.win.addstr(f'{"YOU WIN!":^{self.width}}\n',
-                                title_format)
-                self.win.addstr(
-                    f'{f"Press {reset_key} to reset.":^{self.width}}\n')
-                self.win.addstr(
-                    f'{f"Press {menu_key} to return to menu.":^{self.width}}\n')
+            top, left, rows, cols, cell_width = self.viewport
+            for rid, cid in self.dirty:
+                # cells off screen get painted when they scroll into view
+                if not (top <= rid < top + rows and left <= cid < left + cols):
+                    continue
+                if self.ansi:
+                    self.ansi_rows.add(rid)
+                    continue
+                self.pad.move(rid, cid * cell_width)
+                self.display_cell_at(rid, cid, cell_width == 3)
+        self.dirty.clear()
+        self.refresh_pad()
 
 
 def init_colors(win: curses.window, colors: {str: dict}) -> None:
@@ -770,6 +865,51 @@ def init_colors(win: curses.window, colors: {str: dict}) -> None:
                     pass
 
 
+class Controls:
+    # config['CONTROLS'] turned around, so finding what a key or mouse
+    # event does is one lookup instead of a scan over every control.
+    # built once at startup
+    # when a key is bound to more than one action the first of these wins
+    order = ['EXIT', 'HELP', 'HIGHSCORES', 'MENU', 'REVEAL', 'FLAG', 'RESET',
+             'HINT', 'OVERLAY', 'LEFT', 'RIGHT', 'UP', 'DOWN', 'HOME', 'END',
+             'FLOOR', 'CEILING']
+    directions = {'LEFT', 'RIGHT', 'UP', 'DOWN', 'HOME', 'END', 'FLOOR',
+                  'CEILING'}
+
+    def __init__(self, controls: {str: [str]}) -> None:
+        self.keys: {str: str} = {}
+        self.mouse: [(int, str)] = []
+        # what each mouse button state maps to, filled in as they come up
+        self.mouse_cache: {int: str} = {}
+
+        def rank(action: str) -> int:
+            if action in Controls.order:
+                return Controls.order.index(action)
+            return len(Controls.order)
+
+        for action in sorted(controls, key=rank):
+            for o in controls[action] or []:
+                if o is None:
+                    continue
+                if o.startswith('BUTTON'):
+                    # mouse events are a bitmask named like BUTTON1_CLICKED
+                    self.mouse.append((getattr(curses, o), action))
+                else:
+                    self.keys.setdefault(o, action)
+
+    def action(self, key: str) -> str:
+        # the action bound to a key, None if there isn't one
+        return self.keys.get(key)
+
+    def mouse_action(self, bstate: int) -> str:
+        # the action bound to a mouse event, None if there isn't one
+        if bstate not in self.mouse_cache:
+            self.mouse_cache[bstate] = next(
+                (action for mask, action in self.mouse if bstate & mask),
+                None)
+        return self.mouse_cache[bstate]
+
+
 class _Sentinel:
     pass
 
@@ -777,6 +917,7 @@ class _Sentinel:
 def setup(win: curses.window) -> None:
     # loading config
     config = load_config.load_config()
+    config['KEYMAP'] = Controls(config['CONTROLS'])
     load_highscore.generate_dummy_if_needed()
 
     # defaults and arg parse
@@ -794,9 +935,12 @@ def setup(win: curses.window) -> None:
     parser.add_argument('--no-flash', action='store_true',
                         default=config['SETUP']['NO_FLASH'])
     parser.add_argument('--seed', default=None, type=int)
+    parser.add_argument('--renderer', default='curses',
+                        choices=['curses', 'ansi'])
     args = parser.parse_args()
 
     config['SEED'] = args.seed
+    config['RENDERER'] = args.renderer
     if args.seed is not None:
         random.seed(args.seed)
 
@@ -830,7 +974,6 @@ def setup(win: curses.window) -> None:
 
     init_colors(win, config["LOOK"]['COLORS'])
     curses.mousemask(curses.ALL_MOUSE_EVENTS)
-    win.nodelay(True)
     try:
         curses.curs_set(0)
     except curses.error:
@@ -933,7 +1076,7 @@ def logo(win: curses.window) -> None:
 # used as a helper for help screen
 def control_str(configs: [str]) -> str:
     out = ''
-    for c in configs:
+    for c in configs or []:
         if c is None:
             continue
         if c == ' ':
@@ -978,7 +1121,7 @@ def display_sample(win: curses.window, config: dict) -> None:
         for row in display:
             for cell in row:
                 win.addstr('[', curses.color_pair(Board.str_to_id['BRACKETS']))
-                cell.display(win, symbols)
+                display_cell(win, cell, symbols)
                 win.addstr(']', curses.color_pair(Board.str_to_id['BRACKETS']))
             win.addstr('\n')
         return
@@ -990,7 +1133,7 @@ def display_sample(win: curses.window, config: dict) -> None:
     if term_width > len(max(out2.split('\n'), key=len)):
         for row in display:
             for cell in row:
-                cell.display(win, symbols)
+                display_cell(win, cell, symbols)
             win.addstr('\n')
         return
     return
@@ -1008,12 +1151,16 @@ def splash(win: curses.window, config: dict) -> None:
     expert_ratio = config["SETUP"]["EXPERT"]["RATIO"]
 
     # read in highscore data
-    raw_highscore_data = load_highscore.load_raw_highscores()
-
     total_list: [[[str, str, str]]] = []
-    for difficulty in Difficulty:
-        total_list.append([x for x in raw_highscore_data
-                           if x[0] == difficulty.name])
+    if config['HIGHSCORES']['STORAGE'] == 'sqlite':
+        # only the best of each is shown
+        for difficulty in Difficulty:
+            total_list.append(load_highscore.convert_real_to_raw(
+                highscore_db.load_highscores_for_difficulty(difficulty, 1)))
+    else:
+        for difficulty in Difficulty:
+            total_list.append(
+                load_highscore.load_raw_highscores_for_difficulty(difficulty))
 
     win.clear()
     logo(win)
@@ -1120,14 +1267,17 @@ def splash(win: curses.window, config: dict) -> None:
     win.refresh()
 
     # Handle user interaction (selecting difficulty)
+    # nothing on the menu changes by itself, so just wait for a key
+    win.timeout(-1)
     while True:
         try:
             key = win.getkey(0, 0)
         except curses.error:
             key = curses.ERR
-        if key in config["CONTROLS"].get("EXIT"):
+        action = config['KEYMAP'].action(key)
+        if action == 'EXIT':
             raise SystemExit(0)
-        if key in config['CONTROLS'].get('UP'):
+        if action == 'UP':
             menu_cursor = (menu_cursor - 1) % 5
             win.clear()
             logo(win)
@@ -1135,7 +1285,7 @@ def splash(win: curses.window, config: dict) -> None:
             # DISPLAY all symbols (useful if changing themes:)
             display_sample(win, config)
             win.refresh()
-        if key in config['CONTROLS'].get('DOWN'):
+        if action == 'DOWN':
             menu_cursor = (menu_cursor + 1) % 5
             win.clear()
             logo(win)
@@ -1153,28 +1303,28 @@ def splash(win: curses.window, config: dict) -> None:
             win.refresh()
         if (key == '1' or
                 (menu_cursor == 0
-                 and key in config['CONTROLS'].get('REVEAL'))):
+                 and action == 'REVEAL')):
             board = Board(int(beginner_width), int(beginner_height),
                           float(beginner_ratio), Difficulty.BEGINNER,
                           config, win)
             break
         elif (key == '2' or
                 (menu_cursor == 1
-                 and key in config['CONTROLS'].get('REVEAL'))):
+                 and action == 'REVEAL')):
             board = Board(int(intermediate_width), int(intermediate_height),
                           float(intermediate_ratio), Difficulty.INTERMEDIATE,
                           config, win)
             break
         elif (key == '3' or
                 (menu_cursor == 2
-                 and key in config['CONTROLS'].get('REVEAL'))):
+                 and action == 'REVEAL')):
             board = Board(int(expert_width), int(expert_height),
                           float(expert_ratio), Difficulty.EXPERT,
                           config, win)
             break
         elif (key == '4' or
                 (menu_cursor == 3
-                 and key in config['CONTROLS'].get('REVEAL'))):
+                 and action == 'REVEAL')):
             min_width = config["SETUP"]['MIN_WIDTH']
             min_height = config["SETUP"]['MIN_HEIGHT']
             max_width = config["SETUP"]['MAX_WIDTH']
@@ -1232,7 +1382,7 @@ def splash(win: curses.window, config: dict) -> None:
             break
         elif (key == '5' or
                 (menu_cursor == 4
-                 and key in config['CONTROLS'].get('REVEAL'))):
+                 and action == 'REVEAL')):
             if not config['SETUP']['NO_FLASH']:
                 win.addstr(exit_spot[0], exit_spot[1], config['LOOK'][
                     'SYMBOLS']['MINE'])
@@ -1247,120 +1397,117 @@ def splash(win: curses.window, config: dict) -> None:
     main_loop(win, board, config)
 
 
+def draw_board(win: curses.window, board: Board, help_str: str) -> None:
+    # only repaint everything when the board asks for it, otherwise just
+    # the cells that changed. nothing is sent to the terminal until
+    # curses.doupdate() is called
+    if board.needs_redraw:
+        win.erase()
+        board.display()
+        w = board.text_width()
+        win.addstr(f'{f"Press {help_str} for help.":^{w}.{w}}')
+    else:
+        board.display_dirty()
+    win.noutrefresh()
+
+
+def read_key(win: curses.window) -> str:
+    # the next key, or curses.ERR if none came before the timeout
+    try:
+        return win.getkey(0, 0)
+    except curses.error:
+        return curses.ERR
+
+
+def handle_key(win: curses.window, board: Board, config: dict,
+               key: str) -> bool:
+    # applies a single key to the board without drawing anything.
+    # returns False if the game should stop
+    keymap = config['KEYMAP']
+    if key == 'KEY_MOUSE':
+        bstate = 0
+        mx, my = (-1, -1)
+        try:
+            _, mx, my, _, bstate = curses.getmouse()
+        except curses.error:
+            pass
+        action = keymap.mouse_action(bstate)
+        if action == 'REVEAL' or action == 'FLAG':
+            # clicks act on the cell under the mouse
+            if not board.set_cursor_from_mouse(mx, my):
+                return True
+    else:
+        action = keymap.action(key)
+
+    if action == 'EXIT':
+        board.close()
+        return False
+    elif action == 'HELP':
+        board.pause()
+        show_help(win, config)
+    elif action == 'HIGHSCORES':
+        board.show_highscores()
+    elif action == 'MENU':
+        board.close()
+        splash(win, config)
+        return False
+    elif action == 'REVEAL':
+        board.reveal()
+    elif action == 'FLAG':
+        board.flag()
+    elif action == 'RESET':
+        board.reset()
+    elif action == 'HINT':
+        board.hint()
+    elif action == 'OVERLAY':
+        board.toggle_overlay()
+    elif action in Controls.directions:
+        board.move_direction(action)
+    return True
+
+
 def main_loop(win: curses.window, board: Board, config: dict) -> None:
-    term_height, term_width = win.getmaxyx()
     controls = config["CONTROLS"]
     help_str = control_str(controls.get("HELP"))
     # show board
     win.clear()
-    board.display()
-    win.refresh()
+    board.needs_redraw = True
+    draw_board(win, board, help_str)
+    curses.doupdate()
 
     # handle user input
     while True:
-        try:
-            key = win.getkey(0, 0)
-        except curses.error:
-            key = curses.ERR
-        if key in controls.get("EXIT"):
-            break
-        elif key in controls.get("HELP"):
-            board.pause()
-            show_help(win, config)
-        elif key in controls.get("HIGHSCORES"):
-            board.show_highscores()
-        elif key in controls.get("MENU"):
-            splash(win, config)
-            break
-        elif key in controls.get("REVEAL"):
-            board.reveal()
-        elif key in controls.get("FLAG"):
-            board.flag()
-        elif key in controls.get("RESET"):
-            board.reset()
-        elif (key in controls.get("LEFT") or
-              key in controls.get("RIGHT") or
-              key in controls.get("UP") or
-              key in controls.get("DOWN") or
-              key in controls.get("HOME") or
-              key in controls.get("END") or
-              key in controls.get("FLOOR") or
-              key in controls.get("CEILING")):
-
-            for k_n, k_v in controls.items():
-                if key in k_v:
-                    board.move_direction(k_n)
-        elif key == 'KEY_MOUSE':
-            bstate = 0
-            mx, my = (-1, -1)
-            try:
-                _, mx, my, _, bstate = curses.getmouse()
-            except curses.error:
-                pass
-            if mouse_helper(controls, 'EXIT', bstate):
-                break
-            elif mouse_helper(controls, 'HELP', bstate):
-                board.pause()
-                show_help(win, config)
-            elif mouse_helper(controls, 'HIGHSCORES', bstate):
-                board.show_highscores()
-            elif mouse_helper(controls, 'MENU', bstate):
-                splash(win, config)
-                break
-            elif mouse_helper(controls, 'REVEAL', bstate):
-                if board.set_cursor_from_mouse(mx, my):
-                    board.reveal()
-            elif mouse_helper(controls, 'FLAG', bstate):
-                if board.set_cursor_from_mouse(mx, my):
-                    board.flag()
-            elif (mouse_helper(controls, 'LEFT', bstate)
-                  or mouse_helper(controls, 'RIGHT', bstate)
-                  or mouse_helper(controls, 'UP', bstate)
-                  or mouse_helper(controls, 'DOWN', bstate)
-                  or mouse_helper(controls, 'HOME', bstate)
-                  or mouse_helper(controls, 'END', bstate)
-                  or mouse_helper(controls, 'FLOOR', bstate)
-                  or mouse_helper(controls, 'CEILING', bstate)):
-                for k_n, k_v in controls.items():
-                    if key in k_v:
-                        board.move_direction(k_n)
-        elif key == curses.ERR:
+        # block until a key is pressed or the clock needs to tick over
+        win.timeout(board.next_tick())
+        key = read_key(win)
+        if key == curses.ERR:
+            # nothing was pressed, only the clock has changed
             if board.state != GameState.PAUSED:
-                board.display()
-                if term_width > board.full_width:
-                    w = board.full_width
-                else:
-                    w = board.width
-                win.addstr(f'{f"Press {help_str} for help.":^{w}}')
+                board.display_timer()
                 win.noutrefresh()
-                win.refresh()
+                curses.doupdate()
             continue
-        if board.state != GameState.PAUSED or key == curses.KEY_RESIZE:
-            term_height, term_width = win.getmaxyx()
-            win.clear()
-            board.display()
-            if term_width > board.full_width:
-                w = board.full_width
-            else:
-                w = board.width
-            win.addstr(f'{f"Press {help_str} for help.":^{w}}')
-        win.refresh()
-
-    raise SystemExit(0)
 
-
-def mouse_helper(controls: {str, List[int]}, command: str, bstate: int)\
-        -> bool:
-    if controls.get(command) is None:
-        return False
-    for o in controls.get(command):
-        try:
-            attr = getattr(curses, str(o))
-        except (ValueError, AttributeError):
-            attr = None
-        if attr and bstate & attr:
-            return True
-    return False
+        # apply everything that is already waiting before drawing, so
+        # holding a key down costs one frame per read instead of one per
+        # key and the screen can't fall behind
+        win.timeout(0)
+        resized = False
+        while key != curses.ERR:
+            if not handle_key(win, board, config, key):
+                raise SystemExit(0)
+            if key == 'KEY_RESIZE':
+                resized = True
+            key = read_key(win)
+
+        if resized:
+            win.clear()
+            board.needs_redraw = True
+        if board.state != GameState.PAUSED or resized:
+            draw_board(win, board, help_str)
+        else:
+            win.noutrefresh()
+        curses.doupdate()
 
 
 if __name__ == '__main__':
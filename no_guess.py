@@ -0,0 +1,112 @@
+# Amelia Sinclaire 2024
+import concurrent.futures
+import os
+import random
+import threading
+
+from engine import Engine, GameState
+import solver
+
+# builds boards that can be won from the first click without ever having
+# to guess. random layouts are played out by the solver and thrown away
+# until one of them is won, so the candidates are spread over a pool of
+# worker processes.
+
+# candidates each worker tries per task
+batch_size = 8
+# give up on finding a no guess board after this many candidates. dense
+# boards might never have one
+max_candidates = 20_000
+# seconds between checks of a find_layout stop event while waiting on
+# the pool
+stop_poll = 0.05
+# try candidates right here instead of in the pool. set by code that is
+# already running in a worker process, like simulate
+in_process = False
+
+_executor = None
+# layouts are also made on layout_queue's thread
+_executor_lock = threading.Lock()
+
+
+def executor() -> concurrent.futures.ProcessPoolExecutor:
+    # one pool for the whole run, starting worker processes is slow
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ProcessPoolExecutor()
+    return _executor
+
+
+def solvable(engine: Engine, row: int, col: int) -> bool:
+    # plays a fresh engine from a first click at row, col using only
+    # moves the solver is certain of. True if that wins the game
+    engine.reveal(row, col)
+    while engine.state == GameState.PLAYING:
+        safe, mines = solver.solve(engine)
+        if not safe:
+            return False
+        for r, c in safe:
+            engine.open_cell(r, c)
+    return engine.state == GameState.WON
+
+
+def try_seeds(width: int, height: int, n_mines: int, open_start: bool,
+              row: int, col: int, seeds: [int]) -> [int]:
+    # runs in a worker. the mines of the first seed whose board is
+    # solvable, None if none of them are
+    for seed in seeds:
+        engine = Engine(width, height, n_mines, open_start=open_start,
+                        rng=random.Random(seed))
+        if solvable(engine, row, col):
+            return [r * width + c for r, c in engine.mines]
+    return None
+
+
+def find_layout(engine: Engine, row: int, col: int,
+                stop: threading.Event = None) -> [int]:
+    # flat indices of the mines of a board that can be solved from a first
+    # click at row, col. seeds come from the engine's rng and results are
+    # taken in the order they were asked for, not the order they finish,
+    # so seeded games still always get the same board. None if no such
+    # board turned up in max_candidates tries, or stop was set first
+    args = (engine.width, engine.height, engine.n_mines, engine.open_start,
+            row, col)
+    if in_process:
+        # draws the same seeds in the same order as the pool would, so
+        # it finds the same board
+        for _ in range(max_candidates // batch_size):
+            if stop is not None and stop.is_set():
+                return None
+            seeds = [engine.rng.getrandbits(64) for _ in range(batch_size)]
+            layout = try_seeds(*args, seeds)
+            if layout is not None:
+                return layout
+        return None
+
+    pool = executor()
+    in_flight = 2 * (os.cpu_count() or 1)
+    futures = []
+    tried = 0
+    while tried < max_candidates:
+        if stop is not None and stop.is_set():
+            break
+        while len(futures) < in_flight:
+            seeds = [engine.rng.getrandbits(64) for _ in range(batch_size)]
+            futures.append(pool.submit(try_seeds, *args, seeds))
+        if stop is not None:
+            # the pending batches are cancelled below as soon as stop is
+            # set, instead of after the one being waited on is done
+            while not (futures[0].done() or stop.is_set()):
+                concurrent.futures.wait(futures[:1], timeout=stop_poll)
+            if stop.is_set():
+                break
+        layout = futures.pop(0).result()
+        tried += batch_size
+        if layout is not None:
+            for future in futures:
+                future.cancel()
+            return layout
+    for future in futures:
+        future.cancel()
+    return None
@@ -0,0 +1,230 @@
+# Amelia Sinclaire 2024
+import math
+
+from engine import OPEN_BIT, Engine
+import solver
+
+# the exact chance that each unopened cell is a mine, given only what the
+# player can see. like the solver, flags are ignored.
+#
+# the frontier (unopened cells next to an opened number) splits into
+# components that share no constraints, so each one's valid mine
+# placements can be counted on its own. every other unopened cell is
+# interior and nothing is known about it, so for a total of k mines on the
+# frontier there are comb(interior, mines left - k) ways to place the rest.
+# weighting each frontier placement by that gives the exact probabilities.
+
+
+def components(found: {int: int}) -> [(int, [(int, int)])]:
+    # splits constraints into groups that share no cells,
+    # as (mask of every cell in the group, [(mask, mines)])
+    groups = []
+    for mask, n in found.items():
+        merged_mask = mask
+        merged = [(mask, n)]
+        rest = []
+        for g_mask, g_constraints in groups:
+            if g_mask & merged_mask:
+                merged_mask |= g_mask
+                merged += g_constraints
+            else:
+                rest.append((g_mask, g_constraints))
+        groups = rest + [(merged_mask, merged)]
+    return groups
+
+
+def enumerate_component(cells: [int], found: [(int, int)]) \
+        -> ([int], [[int]]):
+    # counts every way to place mines on cells (frontier bits) that
+    # satisfies found. returns (placements with k mines,
+    # for each k how many of those placements have a mine on each cell)
+    #
+    # cells are decided one at a time, in an order where each is next to
+    # the last ones. partway through, all that matters for the rest is how
+    # many mines each half decided constraint still needs, so placements
+    # that agree on that are counted together instead of one by one.
+    # counts are kept as {mines so far: ways}
+    order = []
+    todo = set(cells)
+    while todo:
+        start = min(todo)
+        queue = [start]
+        todo.discard(start)
+        while queue:
+            bit = queue.pop(0)
+            order.append(bit)
+            for mask, n in found:
+                if not mask >> bit & 1:
+                    continue
+                for other in list(todo):
+                    if mask >> other & 1:
+                        todo.discard(other)
+                        queue.append(other)
+    size = len(order)
+    position = {bit: i for i, bit in enumerate(order)}
+
+    # the positions each constraint covers
+    spots = [sorted(position[bit] for bit in order if mask >> bit & 1)
+             for mask, n in found]
+    touches = [[] for _ in range(size)]
+    # cells of a constraint still to be decided after each of its cells
+    after = {}
+    for c, c_spots in enumerate(spots):
+        for j, i in enumerate(c_spots):
+            touches[i].append(c)
+            after[c, i] = len(c_spots) - j - 1
+    # constraints with cells both before and at or after each position
+    active = [[c for c, c_spots in enumerate(spots)
+               if c_spots[0] < i <= c_spots[-1]] for i in range(size + 1)]
+
+    # forward: for each position, {mines still needed: ways by mines}
+    forward = [{(): {0: 1}}]
+    steps = []
+    for i in range(size):
+        layer = {}
+        step = []
+        for state, ways in forward[i].items():
+            need = dict(zip(active[i], state))
+            for is_mine in (0, 1):
+                new_need = dict(need)
+                ok = True
+                for c in touches[i]:
+                    n = need.get(c, found[c][1]) - is_mine
+                    if not 0 <= n <= after[c, i]:
+                        ok = False
+                        break
+                    new_need[c] = n
+                if not ok:
+                    continue
+                new_state = tuple(new_need[c] for c in active[i + 1])
+                step.append((state, is_mine, new_state))
+                into = layer.setdefault(new_state, {})
+                for k, w in ways.items():
+                    into[k + is_mine] = into.get(k + is_mine, 0) + w
+        forward.append(layer)
+        steps.append(step)
+
+    # backward: ways to finish from each position, by mines still to come
+    backward = [None] * size + [{(): {0: 1}}]
+    for i in range(size - 1, -1, -1):
+        layer = {}
+        for state, is_mine, new_state in steps[i]:
+            into = layer.setdefault(state, {})
+            for k, w in backward[i + 1].get(new_state, {}).items():
+                into[k + is_mine] = into.get(k + is_mine, 0) + w
+        backward[i] = layer
+
+    totals = [0] * (size + 1)
+    for k, w in forward[size].get((), {}).items():
+        totals[k] += w
+    per_cell = [[0] * len(cells) for _ in range(size + 1)]
+    column = {bit: j for j, bit in enumerate(cells)}
+    for i in range(size):
+        j = column[order[i]]
+        for state, is_mine, new_state in steps[i]:
+            if not is_mine:
+                continue
+            before = forward[i][state]
+            rest = backward[i + 1].get(new_state, {})
+            for k1, w1 in before.items():
+                for k2, w2 in rest.items():
+                    per_cell[k1 + k2 + 1][j] += w1 * w2
+    return totals, per_cell
+
+
+def convolve(a: [int], b: [int]) -> [int]:
+    # ways to get each total from two independent counts
+    out = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if not x:
+            continue
+        for j, y in enumerate(b):
+            out[i + j] += x * y
+    return out
+
+
+def probabilities(engine: Engine) -> {(int, int): float}:
+    # {(row, col): chance of a mine} for every unopened cell
+    width = engine.width
+    unopened = [idx for idx, cell in enumerate(engine.cells)
+                if not cell & OPEN_BIT]
+    if engine.is_first_click:
+        # every cell is as likely as any other
+        p = engine.n_mines / len(unopened) if unopened else 0
+        return {divmod(idx, width): p for idx in unopened}
+
+    frontier, found = solver.constraints(engine)
+    # settle everything that can be settled for sure first, it makes the
+    # components a lot smaller
+    safe_mask, mine_mask = solver.deduce(found)
+    known = safe_mask | mine_mask
+    reduced = {}
+    for mask, n in found.items():
+        n -= (mask & mine_mask).bit_count()
+        mask &= ~known
+        if mask:
+            reduced[mask] = n
+
+    chance = {}
+    for bit, idx in enumerate(frontier):
+        if safe_mask >> bit & 1:
+            chance[idx] = 0.0
+        elif mine_mask >> bit & 1:
+            chance[idx] = 1.0
+
+    groups = []
+    for g_mask, g_found in components(reduced):
+        cells = [b for b in range(len(frontier)) if g_mask >> b & 1]
+        totals, per_cell = enumerate_component(cells, g_found)
+        groups.append((cells, totals, per_cell))
+
+    in_frontier = set(frontier)
+    interior = [idx for idx in unopened if idx not in in_frontier]
+    mines_left = engine.n_mines - mine_mask.bit_count()
+
+    def weight(k: int) -> int:
+        # ways to place the rest of the mines in the interior
+        if not 0 <= mines_left - k <= len(interior):
+            return 0
+        return math.comb(len(interior), mines_left - k)
+
+    # placements over all components by total mines, and over all but
+    # each one component
+    everything = [1]
+    for cells, totals, per_cell in groups:
+        everything = convolve(everything, totals)
+    total_weight = sum(w * weight(k) for k, w in enumerate(everything))
+    if total_weight == 0:
+        # what is on screen can't happen, the mine count must be off
+        return {divmod(idx, width): chance.get(idx, 0.0)
+                for idx in unopened}
+
+    for g, (cells, totals, per_cell) in enumerate(groups):
+        others = [1]
+        for h, (_, h_totals, _) in enumerate(groups):
+            if h != g:
+                others = convolve(others, h_totals)
+        # for k mines in this component, the weight of everything else
+        rest = [sum(w * weight(k + j) for j, w in enumerate(others))
+                for k in range(len(totals))]
+        for j, bit in enumerate(cells):
+            hits = sum(per_cell[k][j] * rest[k] for k in range(len(totals)))
+            chance[frontier[bit]] = hits / total_weight
+
+    if interior:
+        expected = sum(w * weight(k) * (mines_left - k)
+                       for k, w in enumerate(everything))
+        p = expected / total_weight / len(interior)
+        for idx in interior:
+            chance[idx] = p
+
+    return {divmod(idx, width): chance[idx] for idx in unopened}
+
+
+def safest(engine: Engine) -> (int, int):
+    # the unopened cell least likely to be a mine, for automated players.
+    # None if there are no unopened cells
+    chance = probabilities(engine)
+    if not chance:
+        return None
+    return min(chance, key=lambda x: (chance[x], x))
@@ -0,0 +1,133 @@
+# Amelia Sinclaire 2024
+import argparse
+import concurrent.futures
+import functools
+import os
+import random
+import sys
+import time
+
+from engine import Engine, GameState, OPEN_BIT
+import no_guess
+import probability
+import solver
+
+# plays lots of games with no terminal, to measure how boards play and how
+# fast the engine is. every game is seeded, so a game can be replayed.
+#
+#   python simulate.py -W 30 -H 16 -r 0.206 --seeds 0:1000 -s probability
+#
+# strategies:
+#   random       opens random unopened cells
+#   solver       opens every cell the solver proves safe, guesses randomly
+#                when there are none
+#   probability  like solver, but guesses the cell least likely to be a mine
+
+strategies = ['random', 'solver', 'probability']
+
+
+def guess(engine: Engine, strategy: str, rng: random.Random) -> (int, int):
+    if strategy == 'probability':
+        return probability.safest(engine)
+    unopened = [idx for idx, cell in enumerate(engine.cells)
+                if not cell & OPEN_BIT]
+    return divmod(rng.choice(unopened), engine.width)
+
+
+def play(width: int, height: int, n_mines: int, strategy: str,
+         open_start: bool, no_guess_boards: bool, seed: int) \
+        -> (int, bool, int, int, float):
+    # plays one game to the end, returns
+    # (seed, won, clicks, cells opened, cpu seconds)
+    start = time.process_time()
+    rng = random.Random(seed)
+    engine = Engine(width, height, n_mines, open_start=open_start,
+                    no_guess=no_guess_boards, rng=rng)
+    # the first click goes where the cursor starts
+    engine.reveal(height // 2, width // 2)
+    while engine.state == GameState.PLAYING:
+        safe = set()
+        if strategy != 'random':
+            safe, mines = solver.solve(engine)
+        if not safe:
+            safe = [guess(engine, strategy, rng)]
+        for row, col in sorted(safe):
+            # an earlier cell in the batch may have flood filled this one
+            # already, clicking it again would only count as a move
+            if engine.cells[row * width + col] & OPEN_BIT:
+                continue
+            engine.reveal(row, col)
+    opened = width * height - n_mines - engine.safe_remaining
+    return (seed, engine.state == GameState.WON, len(engine.moves), opened,
+            time.process_time() - start)
+
+
+def init_worker() -> None:
+    # games already run one per worker, so a no guess board is searched
+    # for inside the worker instead of starting another pool
+    no_guess.in_process = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Play seeded games with no terminal.')
+    parser.add_argument('-W', '--width', default=30, type=int)
+    parser.add_argument('-H', '--height', default=16, type=int)
+    parser.add_argument('-r', '--ratio', default=0.206, type=float)
+    parser.add_argument('--seeds', default='0:100',
+                        help='range of seeds to play, as start:stop')
+    parser.add_argument('-s', '--strategy', default='probability',
+                        choices=strategies)
+    parser.add_argument('--open-start', action='store_true')
+    parser.add_argument('--no-guess', action='store_true')
+    parser.add_argument('-j', '--workers', default=os.cpu_count(), type=int)
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='only print the totals')
+    args = parser.parse_args()
+
+    if args.width < 1 or args.height < 1:
+        raise ValueError(f'Invalid size: {args.width}x{args.height}')
+    if args.ratio < 0 or args.ratio > 1:
+        raise ValueError(
+            f'Invalid mine ratio: {args.ratio:.2f}. Must be between 0 and 1')
+    try:
+        start, stop = (int(x) for x in args.seeds.split(':'))
+    except ValueError:
+        raise ValueError(f'Invalid seeds: {args.seeds}. Must be start:stop')
+    n_mines = round(args.width * args.height * args.ratio)
+
+    games = 0
+    wins = 0
+    cpu = 0.0
+    began = time.perf_counter()
+    if not args.quiet:
+        print('seed\twon\tclicks\topened\tcpu_ms', flush=True)
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=args.workers, initializer=init_worker) as pool:
+        seeds = range(start, stop)
+        # chunks keep the overhead per game down, results still come back
+        # in seed order
+        chunksize = max(1, len(seeds) // (8 * (args.workers or 1)))
+        game = functools.partial(play, args.width, args.height, n_mines,
+                                 args.strategy, args.open_start,
+                                 args.no_guess)
+        results = pool.map(game, seeds, chunksize=chunksize)
+        for seed, won, clicks, opened, seconds in results:
+            games += 1
+            wins += won
+            cpu += seconds
+            if not args.quiet:
+                print(f'{seed}\t{int(won)}\t{clicks}\t{opened}\t'
+                      f'{seconds * 1000:.3f}', flush=True)
+    wall = time.perf_counter() - began
+
+    if not games:
+        print('no games played', file=sys.stderr)
+        return
+    print(f'{games} games, {wins} won ({100 * wins / games:.1f}%), '
+          f'{wall:.2f}s, {games / wall:.1f} games/s, '
+          f'{1000 * cpu / games:.3f} ms cpu/game', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
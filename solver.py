@@ -0,0 +1,151 @@
+# Amelia Sinclaire 2024
+from engine import COUNT_MASK, OPEN_BIT, Engine
+
+# works out which unopened cells are certainly safe and which are certainly
+# mines, using only what the player can see: the opened numbers and the
+# total number of mines. flags are ignored, they could be wrong.
+#
+# every opened number gives a constraint, "exactly n of these unopened
+# cells are mines". the unopened cells next to an opened number (the
+# frontier) are each given a bit, so a set of cells is an int bitmask and
+# set operations are single int operations.
+
+
+def constraints(engine: Engine) -> ([int], {int: int}):
+    # the frontier as flat indices, and every constraint as
+    # {mask of frontier bits: mines among them}
+    width, height = engine.width, engine.height
+    cells = engine.cells
+    frontier = []
+    bits = {}
+    found = {}
+    for idx, cell in enumerate(cells):
+        if not cell & OPEN_BIT or not cell & COUNT_MASK:
+            continue
+        row, col = divmod(idx, width)
+        mask = 0
+        for n_r, n_c in Engine.neighbors:
+            r, c = row + n_r, col + n_c
+            if not (0 <= r < height and 0 <= c < width):
+                continue
+            n_idx = r * width + c
+            if cells[n_idx] & OPEN_BIT:
+                continue
+            bit = bits.get(n_idx)
+            if bit is None:
+                bit = bits[n_idx] = len(frontier)
+                frontier.append(n_idx)
+            mask |= 1 << bit
+        if mask:
+            found[mask] = cell & COUNT_MASK
+    return frontier, found
+
+
+def deduce(found: {int: int}) -> (int, int):
+    # runs the rules below until nothing new turns up.
+    # returns (mask of safe cells, mask of mines)
+    #
+    # single cell: a constraint with 0 mines is all safe, one with as many
+    #   mines as cells is all mines.
+    # subset: if a is inside b then b - a holds b's mines minus a's.
+    # superset: if b has so many more mines than a that every cell in b
+    #   but not a must be one, then every cell in a but not b is safe.
+    safe = 0
+    mines = 0
+    found = dict(found)
+    while found:
+        new_safe = 0
+        new_mines = 0
+        for mask, n in found.items():
+            if n == 0:
+                new_safe |= mask
+            elif n == mask.bit_count():
+                new_mines |= mask
+
+        if not new_safe and not new_mines:
+            # only constraints that share a cell can say anything about
+            # each other
+            by_bit = {}
+            for mask in found:
+                m = mask
+                while m:
+                    low = m & -m
+                    by_bit.setdefault(low, []).append(mask)
+                    m ^= low
+            derived = {}
+            for a, n_a in found.items():
+                seen = set()
+                m = a
+                while m:
+                    low = m & -m
+                    m ^= low
+                    for b in by_bit[low]:
+                        if b == a or b in seen:
+                            continue
+                        seen.add(b)
+                        n_b = found[b]
+                        only_a = a & ~b
+                        only_b = b & ~a
+                        if not only_a:
+                            if only_b not in found:
+                                derived[only_b] = n_b - n_a
+                        elif n_b - n_a == only_b.bit_count():
+                            new_mines |= only_b
+                            new_safe |= only_a
+            if not new_safe and not new_mines:
+                if not derived:
+                    break
+                found.update(derived)
+                continue
+
+        safe |= new_safe
+        mines |= new_mines
+        known = new_safe | new_mines
+        # take what was just worked out out of every constraint
+        updated = {}
+        for mask, n in found.items():
+            n -= (mask & new_mines).bit_count()
+            mask &= ~known
+            if mask:
+                updated[mask] = n
+        found = updated
+    return safe, mines
+
+
+def solve(engine: Engine) -> ({(int, int)}, {(int, int)}):
+    # (cells that are certainly safe, cells that are certainly mines),
+    # only ever unopened ones
+    if engine.is_first_click:
+        # nothing is known before the first click
+        return set(), set()
+
+    frontier, found = constraints(engine)
+    safe_mask, mine_mask = deduce(found)
+    safe = {frontier[b] for b in range(len(frontier)) if safe_mask >> b & 1}
+    mines = {frontier[b] for b in range(len(frontier))
+             if mine_mask >> b & 1}
+
+    # once every mine is accounted for, or every unknown cell has to be
+    # one, the cells away from the frontier are known as well
+    unknown = [idx for idx, cell in enumerate(engine.cells)
+               if not cell & OPEN_BIT and idx not in safe
+               and idx not in mines]
+    mines_left = engine.n_mines - len(mines)
+    if mines_left == 0:
+        safe.update(unknown)
+    elif mines_left == len(unknown):
+        mines.update(unknown)
+
+    width = engine.width
+    return ({divmod(idx, width) for idx in safe},
+            {divmod(idx, width) for idx in mines})
+
+
+def hint(engine: Engine, near: (int, int)) -> (int, int):
+    # the certainly safe cell closest to near, None if there isn't one
+    safe, mines = solve(engine)
+    if not safe:
+        return None
+    row, col = near
+    return min(safe, key=lambda x: (max(abs(x[0] - row), abs(x[1] - col)),
+                                    x))
@@ -0,0 +1,55 @@
+import yaml
+
+import load_config
+from meeleymine import Controls, control_str
+
+# the controls a config.yaml got before HINT and OVERLAY were added
+baseline_controls = {'LEFT': ['KEY_LEFT'],
+                     'RIGHT': ['KEY_RIGHT'],
+                     'UP': ['KEY_UP'],
+                     'DOWN': ['KEY_DOWN'],
+                     'REVEAL': [' ', '\n', 'BUTTON1_CLICKED'],
+                     'FLAG': ['f', 'BUTTON3_CLICKED'],
+                     'RESET': ['r'],
+                     'HOME': ['KEY_HOME'],
+                     'END': ['KEY_END'],
+                     'CEILING': ['KEY_PPAGE'],
+                     'FLOOR': ['KEY_NPAGE'],
+                     'HELP': ['h'],
+                     'HIGHSCORES': ['p'],
+                     'MENU': ['m'],
+                     'EXIT': ['q']}
+
+
+def load_baseline(tmp_path, monkeypatch) -> dict:
+    config = load_config.default_config()
+    config['CONTROLS'] = baseline_controls
+    del config['SETUP']['NO_GUESS']
+    del config['HIGHSCORES']['STORAGE']
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config, allow_unicode=True))
+    monkeypatch.setattr(load_config, 'config_path', str(path))
+    return load_config.load_config()
+
+
+def test_baseline_config_sets_every_control(tmp_path, monkeypatch):
+    controls = load_baseline(tmp_path, monkeypatch)['CONTROLS']
+    for action in Controls.order:
+        assert controls.get(action), action
+        assert control_str(controls[action]) != '{NO KEY SET}'
+
+
+def test_baseline_config_binds_hint_and_overlay(tmp_path, monkeypatch):
+    config = load_baseline(tmp_path, monkeypatch)
+    defaults = load_config.default_config()['CONTROLS']
+    assert config['CONTROLS']['HINT'] == defaults['HINT']
+    assert config['CONTROLS']['OVERLAY'] == defaults['OVERLAY']
+    compiled = Controls(config['CONTROLS'])
+    assert compiled.action('?') == 'HINT'
+    assert compiled.action('o') == 'OVERLAY'
+
+
+def test_control_str_without_keys():
+    assert control_str(None) == '{NO KEY SET}'
+    assert control_str([]) == '{NO KEY SET}'
+    assert control_str([None]) == '{NO KEY SET}'
@@ -0,0 +1,51 @@
+import yaml
+
+import load_config
+from engine import Difficulty
+from meeleymine import Board
+
+
+class FakeWindow:
+    # just enough of a curses window for Board to size its viewport
+    def __init__(self, height: int, width: int) -> None:
+        self.height = height
+        self.width = width
+
+    def getmaxyx(self) -> (int, int):
+        return self.height, self.width
+
+
+def load(tmp_path, monkeypatch, no_guess: bool) -> dict:
+    config = load_config.default_config()
+    config['SETUP']['NO_GUESS'] = no_guess
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config, allow_unicode=True))
+    monkeypatch.setattr(load_config, 'config_path', str(path))
+    config = load_config.load_config()
+    # the ansi renderer needs no curses screen, and a seed keeps the
+    # board from making layouts in the background
+    config['RENDERER'] = 'ansi'
+    config['SEED'] = 1
+    return config
+
+
+def lines_used(config: dict, term_height: int) -> int:
+    board = Board(20, 60, 0.1, Difficulty.CUSTOM, config,
+                  FakeWindow(term_height, 80))
+    board.update_viewport()
+    rows = board.viewport[2]
+    footer = 5
+    if config['SETUP']['NO_GUESS']:
+        # the no guess notice goes under the board
+        footer += 1
+    return 1 + rows + footer
+
+
+def test_tall_board_leaves_room_for_footer(tmp_path, monkeypatch):
+    config = load(tmp_path, monkeypatch, no_guess=False)
+    assert lines_used(config, 24) <= 24
+
+
+def test_tall_board_leaves_room_for_no_guess_notice(tmp_path, monkeypatch):
+    config = load(tmp_path, monkeypatch, no_guess=True)
+    assert lines_used(config, 24) <= 24
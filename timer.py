@@ -0,0 +1,61 @@
+# Amelia Sinclaire 2024
+import math
+import time
+
+# the game clock. it runs on time.perf_counter_ns, which only ever moves
+# forward, so changing the system clock (NTP, daylight saving) can't
+# change a score. all times handed out are integer microseconds
+
+
+class Timer:
+    def __init__(self, resolution: int = 10_000) -> None:
+        # smallest step shown on the clock, in microseconds.
+        # the default is hundredths of a second
+        self.resolution = resolution
+        self.reset()
+
+    def reset(self) -> None:
+        self.running = False
+        # perf_counter_ns() when last started, and the nanoseconds counted
+        # before that
+        self.started = 0
+        self.accumulated = 0
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.started = time.perf_counter_ns()
+        self.running = True
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.accumulated += time.perf_counter_ns() - self.started
+        self.running = False
+
+    def elapsed_ns(self) -> int:
+        if self.running:
+            return self.accumulated + time.perf_counter_ns() - self.started
+        return self.accumulated
+
+    def elapsed(self) -> int:
+        # microseconds on the clock so far
+        return self.elapsed_ns() // 1000
+
+    def next_change(self) -> int:
+        # milliseconds until the shown value changes, -1 if it never will
+        if not self.running:
+            return -1
+        step = self.resolution * 1000
+        left = step - self.elapsed_ns() % step
+        return max(1, math.ceil(left / 1_000_000))
+
+
+def format_time(us: int, digits: int = 6) -> str:
+    # HH:MM:SS.ffffff, cut down to the given number of fractional digits.
+    # the same layout the highscores file uses
+    seconds, us = divmod(us, 1_000_000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    fraction = f'{us:06d}'[:digits]
+    return f'{hours:02d}:{minutes:02d}:{seconds:02d}.{fraction}'